@@ -0,0 +1,56 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+Extensión opcional en Cython para la criba con rueda módulo 30.
+
+Contiene el mismo bucle de tachado que optimizado._tachar_rueda30, pero
+compilado de antemano a C: no hay que esperar a que numba lo compile la
+primera vez. Si la extensión está compilada, optimizado la usa en lugar
+de la versión de numba.
+
+Para compilarla hace falta Cython y un compilador de C:
+
+    cythonize -i criba_ext.pyx
+"""
+
+from libc.stdint cimport int64_t, uint8_t
+
+cdef void _tachar(uint8_t[::1] bits, int64_t raiz, const int64_t[::1] residuos,
+                  const int64_t[:, ::1] salto, const int64_t[:, ::1] byte,
+                  const uint8_t[:, ::1] mascara) noexcept nogil:
+    cdef int64_t n = bits.shape[0]
+    cdef int64_t q, a, b, p, i
+    cdef uint8_t m
+
+    for q in range(raiz // 30 + 1):
+        for a in range(8):
+            p = 30 * q + residuos[a]
+            if p > raiz:
+                return
+            if not (bits[q] >> a) & 1:
+                continue
+            # Los múltiplos p·m con m en la misma clase módulo 30 avanzan
+            # p bytes y caen siempre en el mismo bit
+            for b in range(8):
+                i = q * (30 * q + 2 * residuos[a] + salto[a, b]) + byte[a, b]
+                m = mascara[a, b]
+                while i < n:
+                    bits[i] &= m
+                    i += p
+
+def tachar_rueda30(uint8_t[::1] bits, int64_t raiz, const int64_t[::1] residuos,
+                   const int64_t[:, ::1] salto, const int64_t[:, ::1] byte,
+                   const uint8_t[:, ::1] mascara):
+    """
+    Tacha en el mapa de bits de la rueda módulo 30 los múltiplos de los
+    primos hasta raiz.
+
+    Args:
+        bits (numpy.ndarray): Mapa de bits uint8 de criba_rueda30
+        raiz (int): Raíz entera del límite
+        residuos (numpy.ndarray): RESIDUOS_RUEDA
+        salto (numpy.ndarray): SALTO_RUEDA
+        byte (numpy.ndarray): BYTE_RUEDA
+        mascara (numpy.ndarray): MASCARA_RUEDA
+    """
+    with nogil:
+        _tachar(bits, raiz, residuos, salto, byte, mascara)
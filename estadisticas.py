@@ -3,69 +3,131 @@ Análisis Estadístico de Números Primos Gemelos
 
 Este módulo analiza estadísticamente la distribución de los números
 primos gemelos y genera visualizaciones basadas en distintas propiedades.
+
+El cálculo (calcular_analisis) está separado de los gráficos
+(graficar_analisis), de modo que los datos pueden obtenerse sin cargar
+Matplotlib.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from optimizado import encontrar_primos_gemelos_optimizado
-from matplotlib.ticker import ScalarFormatter
+from gemelos import histograma_distancias
+from optimizado import criba_gemelos, criba_primos_y_gemelos, tipo_entero
 import math
 
+def contar_entre_bordes(valores, bordes):
+    """
+    Cuenta cuántos valores caen en cada ventana [bordes[i], bordes[i+1])
+    con dos búsquedas binarias por borde, sin recorrer todos los valores.
+    
+    Sirve también para ventanas de tamaño irregular, como las que da
+    np.linspace.
+    
+    Args:
+        valores (numpy.ndarray): Números enteros ordenados de menor a mayor
+        bordes (array-like): Bordes crecientes de las ventanas
+        
+    Returns:
+        numpy.ndarray: Cantidad de valores en cada una de las len(bordes) - 1 ventanas
+    """
+    bordes = np.asarray(bordes).astype(np.int64)
+    return np.diff(np.searchsorted(np.asarray(valores), bordes))
+
+def contar_por_ventana(valores, limite, tam_ventana):
+    """
+    Cuenta cuántos valores caen en cada ventana [k·tam, (k+1)·tam) del
+    rango numérico, sin recorrer los valores una vez por ventana.
+    
+    Args:
+        valores (numpy.ndarray): Números enteros no negativos ordenados
+        limite (int): Límite superior del rango analizado
+        tam_ventana (int): Tamaño de cada ventana
+        
+    Returns:
+        numpy.ndarray: Cantidad de valores en cada una de las limite // tam_ventana ventanas
+    """
+    n_ventanas = limite // tam_ventana
+    bordes = np.arange(n_ventanas + 1, dtype=np.int64) * tam_ventana
+    
+    return contar_entre_bordes(valores, bordes)
+
 def calcular_densidad(gemelos, limite, tam_ventana=100):
     """
     Calcula la densidad de primos gemelos a lo largo del rango numérico.
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
         limite (int): Límite superior usado para generar los primos
         tam_ventana (int): Tamaño de la ventana deslizante para calcular la densidad
         
     Returns:
-        tuple: (centros_ventanas, densidades)
+        tuple: (centros_ventanas, densidades, conteos), donde conteos es
+            la cantidad entera de pares que empiezan en cada ventana
     """
     # Extraemos los primeros primos de cada par para simplificar
-    primeros_primos = [par[0] for par in gemelos]
+    primeros_primos = np.asarray(gemelos, dtype=tipo_entero(limite)).reshape(-1, 2)[:, 0]
     
-    # Creamos ventanas deslizantes para calcular la densidad
-    ventanas = np.arange(0, limite, tam_ventana)
-    densidades = []
-    centros_ventanas = []
+    # Contamos cuántos primos gemelos comienzan en cada ventana
+    conteos = contar_por_ventana(primeros_primos, limite, tam_ventana)
     
-    for i in range(len(ventanas) - 1):
-        inicio = ventanas[i]
-        fin = ventanas[i + 1]
-        centro = (inicio + fin) / 2
-        
-        # Contamos cuántos primos gemelos comienzan en esta ventana
-        count = sum(1 for p in primeros_primos if inicio <= p < fin)
-        
-        # Calculamos la densidad (primos por unidad)
-        densidad = count / tam_ventana
+    # Calculamos la densidad (primos por unidad); float32 basta para graficarla
+    densidades = np.divide(conteos, tam_ventana, dtype=np.float32)
+    centros_ventanas = (np.arange(len(conteos)) + 0.5) * tam_ventana
+    
+    return centros_ventanas, densidades, conteos
+
+def calcular_proporcion(conteos, todos_primos, limite, tam_ventana, ancho=1):
+    """
+    Calcula qué proporción de los primos de cada ventana forma parte de
+    un par de primos gemelos, reutilizando los conteos de pares ya calculados.
+    
+    Args:
+        conteos (numpy.ndarray): Pares por ventana de calcular_densidad
+        todos_primos (numpy.ndarray): Todos los primos hasta el límite
+        limite (int): Límite superior usado para generar los primos
+        tam_ventana (int): Tamaño de ventana usado en calcular_densidad
+        ancho (int): Cantidad de ventanas consecutivas agrupadas en cada
+            ventana deslizante (con 1 las ventanas son disjuntas)
         
-        densidades.append(densidad)
-        centros_ventanas.append(centro)
+    Returns:
+        tuple: (centros_ventanas, proporciones), solo para las ventanas con primos
+    """
+    # Cada par gemelo aporta dos primos a su ventana
+    primos_en_pares = 2 * conteos
+    primos_en_ventana = contar_por_ventana(todos_primos, limite, tam_ventana)
+    
+    if ancho > 1:
+        # Sumamos ventanas consecutivas restando sumas acumuladas
+        acumulado = np.cumsum(np.concatenate(([0], primos_en_pares)))
+        primos_en_pares = acumulado[ancho:] - acumulado[:-ancho]
+        acumulado = np.cumsum(np.concatenate(([0], primos_en_ventana)))
+        primos_en_ventana = acumulado[ancho:] - acumulado[:-ancho]
     
-    return centros_ventanas, densidades
+    centros_ventanas = (np.arange(len(primos_en_ventana)) + ancho / 2) * tam_ventana
+    
+    # Calculamos proporción (solo en las ventanas con primos)
+    con_primos = primos_en_ventana > 0
+    proporciones = primos_en_pares[con_primos] / primos_en_ventana[con_primos]
+    
+    return centros_ventanas[con_primos], proporciones
 
 def analizar_distancias_entre_gemelos(gemelos):
     """
     Analiza la distribución de distancias entre pares consecutivos de primos gemelos.
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
         
     Returns:
-        tuple: (distancias, media, mediana, desviacion_estandar)
+        tuple: (distancias, media, mediana, desviacion_estandar), donde
+            distancias es un numpy.ndarray
     """
     # Si hay menos de 2 pares, no podemos calcular distancias
     if len(gemelos) < 2:
-        return [], 0, 0, 0
+        return np.empty(0, dtype=np.int64), 0, 0, 0
     
-    # Calculamos distancias entre pares consecutivos
-    distancias = []
-    for i in range(len(gemelos) - 1):
-        distancia = gemelos[i+1][0] - gemelos[i][0]
-        distancias.append(distancia)
+    # Calculamos distancias entre pares consecutivos en una sola pasada
+    primeros_primos = np.asarray(gemelos)[:, 0]
+    distancias = np.diff(primeros_primos)
     
     # Calculamos estadísticas
     media = np.mean(distancias)
@@ -94,133 +156,164 @@ def comparar_con_pi(limite):
     C = 0.66
     
     # Generamos datos para distintos límites
-    limites_escala = np.logspace(2, np.log10(limite), 20).astype(int)
-    cantidades_reales = []
-    cantidades_estimadas = []
-    
-    for lim in limites_escala:
-        # Calculamos la cantidad real
-        gemelos = encontrar_primos_gemelos_optimizado(lim)
-        cantidades_reales.append(len(gemelos))
-        
-        # Estimamos según la fórmula teórica
-        estimado = C * lim / (np.log(lim) ** 2)
-        cantidades_estimadas.append(estimado)
+    limites_escala = np.logspace(2, np.log10(limite), 20).astype(tipo_entero(limite))
+    
+    # Cribamos una sola vez hasta el límite mayor: los pares hasta cada
+    # límite menor son un prefijo del array ordenado de pares. Con límites
+    # por debajo de 100 la escala empieza en 100 y va hacia abajo, así que
+    # el mayor de la escala puede superar al límite
+    _, segundos = criba_gemelos(int(limites_escala.max()))
+    cantidades_reales = np.searchsorted(segundos, limites_escala, side='right')
+    
+    # Estimamos según la fórmula teórica
+    cantidades_estimadas = C * limites_escala / (np.log(limites_escala) ** 2)
     
     return limites_escala, cantidades_reales, cantidades_estimadas
 
-def visualizar_analisis_completo(limite):
+def calcular_analisis(limite):
     """
-    Realiza un análisis completo de los primos gemelos hasta el límite
-    y genera visualizaciones de los resultados.
+    Calcula todos los datos del análisis estadístico de los primos gemelos
+    hasta el límite, sin generar gráficos ni importar Matplotlib.
     
     Args:
         limite (int): Límite superior para buscar primos gemelos
+        
+    Returns:
+        dict: Datos del análisis con las claves 'limite', 'gemelos',
+            'centros_densidad', 'densidades', 'distancias', 'media',
+            'mediana', 'desviacion', 'limites_escala', 'cantidades_reales',
+            'cantidades_estimadas', 'centros_proporcion', 'proporciones'
+            y 'constante_estimada'
     """
-    print(f"Generando primos gemelos hasta {limite}...")
-    gemelos = encontrar_primos_gemelos_optimizado(limite)
-    print(f"Se encontraron {len(gemelos)} pares de primos gemelos.")
-    
-    # Configuración para gráficos
-    plt.style.use('seaborn')
-    
-    # 1. Gráfico de densidad
-    plt.figure(figsize=(12, 8))
-    plt.subplot(2, 2, 1)
-    
-    tam_ventana = max(limite // 100, 10)  # Ajustar tamaño de ventana según el límite
-    centros, densidades = calcular_densidad(gemelos, limite, tam_ventana)
+    # Una sola criba da todos los primos, que necesita el apartado 4, y
+    # de ellos los pares gemelos
+    todos_primos, gemelos = criba_primos_y_gemelos(limite)
     
-    plt.plot(centros, densidades, 'b-', alpha=0.7)
-    plt.title('Densidad de Primos Gemelos')
-    plt.xlabel('Número')
-    plt.ylabel('Densidad')
-    plt.grid(True, alpha=0.3)
-    
-    # 2. Histograma de distancias
-    plt.subplot(2, 2, 2)
+    # 1. Densidad, con el tamaño de ventana ajustado según el límite
+    tam_ventana = max(limite // 100, 10)
+    centros_densidad, densidades, conteos = calcular_densidad(gemelos, limite, tam_ventana)
     
+    # 2. Distancias entre pares consecutivos
     distancias, media, mediana, desviacion = analizar_distancias_entre_gemelos(gemelos)
     
-    bins = max(20, int(np.sqrt(len(distancias))))
-    plt.hist(distancias, bins=bins, color='orange', alpha=0.7, edgecolor='black')
-    plt.axvline(x=media, color='red', linestyle='--', 
-                label=f'Media: {media:.2f}')
-    plt.axvline(x=mediana, color='green', linestyle='-', 
-                label=f'Mediana: {mediana:.2f}')
+    # 3. Comparación con la estimación teórica
+    limites_escala, cantidades_reales, cantidades_estimadas = comparar_con_pi(limite)
+    
+    # 4. Proporción de primos gemelos respecto a todos los primos, en las
+    # mismas ventanas que la densidad
+    centros_proporcion, proporciones = calcular_proporcion(
+        conteos, todos_primos, limite, tam_ventana)
     
-    plt.title('Distribución de Distancias entre Pares Consecutivos')
-    plt.xlabel('Distancia')
-    plt.ylabel('Frecuencia')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
+    # Estimación de la constante de los primos gemelos
+    ultimo_limite = limites_escala[-1]
+    ultimo_real = cantidades_reales[-1]
+    constante_estimada = ultimo_real * (np.log(ultimo_limite) ** 2) / ultimo_limite
+    
+    return {
+        'limite': limite,
+        'gemelos': gemelos,
+        'centros_densidad': centros_densidad,
+        'densidades': densidades,
+        'distancias': distancias,
+        'media': media,
+        'mediana': mediana,
+        'desviacion': desviacion,
+        'limites_escala': limites_escala,
+        'cantidades_reales': cantidades_reales,
+        'cantidades_estimadas': cantidades_estimadas,
+        'centros_proporcion': centros_proporcion,
+        'proporciones': proporciones,
+        'constante_estimada': constante_estimada,
+    }
+
+def graficar_analisis(datos):
+    """
+    Genera la figura de cuatro gráficos del análisis estadístico a partir
+    de los datos calculados por calcular_analisis.
     
-    # 3. Comparación con estimación teórica
-    plt.subplot(2, 2, 3)
+    Args:
+        datos (dict): Datos devueltos por calcular_analisis
+    """
+    # Matplotlib solo se carga cuando realmente hay que graficar
+    import matplotlib.pyplot as plt
     
-    limites_escala, cantidades_reales, cantidades_estimadas = comparar_con_pi(limite)
+    # El estilo 'seaborn' se renombró a 'seaborn-v0_8' en Matplotlib 3.6
+    estilo = 'seaborn-v0_8' if 'seaborn-v0_8' in plt.style.available else 'seaborn'
     
-    plt.loglog(limites_escala, cantidades_reales, 'b-', marker='o', 
-              markersize=4, label='Cantidad real')
-    plt.loglog(limites_escala, cantidades_estimadas, 'r--', 
-              label='Estimación teórica')
-    
-    plt.title('Comparación con la Estimación Teórica')
-    plt.xlabel('Límite (escala logarítmica)')
-    plt.ylabel('Cantidad de pares gemelos (escala logarítmica)')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # 4. Proporción de primos gemelos respecto a todos los primos
-    plt.subplot(2, 2, 4)
-    
-    # Necesitamos contar todos los primos hasta el límite
-    from optimizado import criba_eratostenes
-    todos_primos = criba_eratostenes(limite)
-    
-    # Calcular proporción en ventanas
-    ventanas = np.linspace(0, limite, min(100, limite//10))
-    proporciones = []
-    centros_ventanas = []
-    
-    for i in range(len(ventanas) - 1):
-        inicio = ventanas[i]
-        fin = ventanas[i + 1]
-        centro = (inicio + fin) / 2
+    with plt.style.context(estilo):
+        fig, axes = plt.subplots(2, 2, figsize=(12, 8))
+        ax_densidad, ax_distancias, ax_teoria, ax_proporcion = axes.ravel()
+        
+        # 1. Gráfico de densidad
+        ax_densidad.plot(datos['centros_densidad'], datos['densidades'], 'b-', alpha=0.7)
+        ax_densidad.set_title('Densidad de Primos Gemelos')
+        ax_densidad.set_xlabel('Número')
+        ax_densidad.set_ylabel('Densidad')
+        ax_densidad.grid(True, alpha=0.3)
+        
+        # 2. Histograma de distancias
+        distancias = datos['distancias']
+        bins = max(20, math.isqrt(len(distancias)))
+        bordes, frecuencias = histograma_distancias(distancias, bins)
+        ax_distancias.bar(bordes[:-1], frecuencias, width=np.diff(bordes), align='edge',
+                          color='orange', alpha=0.7, edgecolor='black')
+        ax_distancias.axvline(x=datos['media'], color='red', linestyle='--', 
+                              label=f"Media: {datos['media']:.2f}")
+        ax_distancias.axvline(x=datos['mediana'], color='green', linestyle='-', 
+                              label=f"Mediana: {datos['mediana']:.2f}")
         
-        # Contamos primos y pares gemelos en esta ventana
-        primos_en_ventana = sum(1 for p in todos_primos if inicio <= p < fin)
-        gemelos_en_ventana = sum(1 for g in gemelos if inicio <= g[0] < fin)
+        ax_distancias.set_title('Distribución de Distancias entre Pares Consecutivos')
+        ax_distancias.set_xlabel('Distancia')
+        ax_distancias.set_ylabel('Frecuencia')
+        ax_distancias.legend()
+        ax_distancias.grid(True, alpha=0.3)
         
-        # Calculamos proporción (si hay primos en la ventana)
-        if primos_en_ventana > 0:
-            proporcion = (gemelos_en_ventana * 2) / primos_en_ventana
-            proporciones.append(proporcion)
-            centros_ventanas.append(centro)
-    
-    plt.plot(centros_ventanas, proporciones, 'g-', alpha=0.7)
-    plt.title('Proporción de Primos en Pares Gemelos')
-    plt.xlabel('Número')
-    plt.ylabel('Proporción')
-    plt.grid(True, alpha=0.3)
-    
-    # Ajustes finales y guardar
-    plt.tight_layout()
-    plt.savefig('analisis_estadistico.png', dpi=300)
-    plt.show()
+        # 3. Comparación con estimación teórica
+        ax_teoria.loglog(datos['limites_escala'], datos['cantidades_reales'], 'b-', marker='o', 
+                         markersize=4, label='Cantidad real')
+        ax_teoria.loglog(datos['limites_escala'], datos['cantidades_estimadas'], 'r--', 
+                         label='Estimación teórica')
+        
+        ax_teoria.set_title('Comparación con la Estimación Teórica')
+        ax_teoria.set_xlabel('Límite (escala logarítmica)')
+        ax_teoria.set_ylabel('Cantidad de pares gemelos (escala logarítmica)')
+        ax_teoria.legend()
+        ax_teoria.grid(True, alpha=0.3)
+        
+        # 4. Proporción de primos gemelos respecto a todos los primos
+        ax_proporcion.plot(datos['centros_proporcion'], datos['proporciones'], 'g-', alpha=0.7)
+        ax_proporcion.set_title('Proporción de Primos en Pares Gemelos')
+        ax_proporcion.set_xlabel('Número')
+        ax_proporcion.set_ylabel('Proporción')
+        ax_proporcion.grid(True, alpha=0.3)
+        
+        # Ajustes finales y guardar
+        fig.tight_layout()
+        fig.savefig('analisis_estadistico.png', dpi=300)
+        plt.show()
+
+def visualizar_analisis_completo(limite):
+    """
+    Realiza un análisis completo de los primos gemelos hasta el límite
+    y genera visualizaciones de los resultados.
+    
+    Args:
+        limite (int): Límite superior para buscar primos gemelos
+    """
+    print(f"Generando primos gemelos hasta {limite}...")
+    datos = calcular_analisis(limite)
+    distancias = datos['distancias']
+    print(f"Se encontraron {len(datos['gemelos'])} pares de primos gemelos.")
+    
+    graficar_analisis(datos)
     
     # Imprimimos algunas estadísticas adicionales
     print("\nESTADÍSTICAS:")
-    print(f"- Media de distancia entre pares: {media:.2f}")
-    print(f"- Mediana de distancia: {mediana:.2f}")
-    print(f"- Desviación estándar: {desviacion:.2f}")
-    print(f"- Distancia máxima observada: {max(distancias) if distancias else 0}")
-    
-    # Estimación de la constante de los primos gemelos
-    ultimo_limite = limites_escala[-1]
-    ultimo_real = cantidades_reales[-1]
-    C_estimada = ultimo_real * (np.log(ultimo_limite) ** 2) / ultimo_limite
-    print(f"- Constante de los primos gemelos estimada: {C_estimada:.4f} (valor teórico ≈ 0.66)")
+    print(f"- Media de distancia entre pares: {datos['media']:.2f}")
+    print(f"- Mediana de distancia: {datos['mediana']:.2f}")
+    print(f"- Desviación estándar: {datos['desviacion']:.2f}")
+    print(f"- Distancia máxima observada: {distancias.max() if len(distancias) else 0}")
+    print(f"- Constante de los primos gemelos estimada: {datos['constante_estimada']:.4f} (valor teórico ≈ 0.66)")
 
 if __name__ == "__main__":
     print("=" * 50)
@@ -9,15 +9,17 @@ como (3,5), (5,7), (11,13), (17,19), etc.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
 from time import time
+from math import isqrt
 
 def es_primo(n):
     """
     Determina si un número es primo verificando si es divisible por
     algún número desde 2 hasta la raíz cuadrada de n.
     
+    Se conserva como referencia didáctica del método de división por
+    tentativa; la generación de primos usa la criba de `criba`.
+    
     Args:
         n (int): Número a verificar
         
@@ -27,14 +29,50 @@ def es_primo(n):
     # Los números menores que 2 no son primos
     if n < 2:
         return False
+    
+    # 2 y 3 son primos
+    if n < 4:
+        return True
+    
+    # Descartamos los múltiplos de 2 y de 3
+    if n % 2 == 0 or n % 3 == 0:
+        return False
         
-    # Verificamos divisibilidad hasta la raíz cuadrada
-    for i in range(2, int(np.sqrt(n)) + 1):
-        if n % i == 0:
+    # Verificamos divisibilidad hasta la raíz cuadrada probando solo
+    # los candidatos de la forma 6k-1 y 6k+1
+    raiz = isqrt(n)
+    i = 5
+    while i <= raiz:
+        if n % i == 0 or n % (i + 2) == 0:
             return False
+        i += 6
             
     return True
 
+def criba(limite):
+    """
+    Marca los números primos hasta un límite dado mediante la
+    Criba de Eratóstenes sobre un array booleano de NumPy.
+    
+    Args:
+        limite (int): Límite superior hasta donde cribar
+        
+    Returns:
+        numpy.ndarray: Array booleano donde la posición n es True si n es primo
+    """
+    # Reservamos sin inicializar y escribimos cada posición una sola vez:
+    # 0 y 1 no son primos y el resto empieza marcado
+    marcas = np.empty(limite + 1, dtype=bool)
+    marcas[:2] = False
+    marcas[2:] = True
+    
+    # Tachamos los múltiplos de cada primo empezando por su cuadrado
+    for p in range(2, isqrt(limite) + 1):
+        if marcas[p]:
+            marcas[p*p::p] = False
+            
+    return marcas
+
 def generar_primos(limite):
     """
     Genera todos los números primos hasta un límite dado.
@@ -43,33 +81,78 @@ def generar_primos(limite):
         limite (int): Límite superior hasta donde generar primos
         
     Returns:
-        list: Lista de números primos encontrados
+        numpy.ndarray: Array con los números primos encontrados, int32 si
+            limite < 2³¹ e int64 en otro caso
+    """
+    tipo = np.int32 if limite < 2**31 else np.int64
+    return np.flatnonzero(criba(limite)).astype(tipo)
+
+def tam_marcas(limite):
     """
-    primos = []
+    Calcula cuántos elementos necesita el array de marcas que usa
+    encontrar_primos_gemelos para un límite dado.
     
-    for n in range(2, limite + 1):
-        if es_primo(n):
-            primos.append(n)
-            
-    return primos
+    Args:
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        
+    Returns:
+        int: Dos marcas por cada k con 6k-1 ≤ limite, una por clase
+    """
+    return 2 * ((limite - 1) // 6 + 1)
 
-def encontrar_primos_gemelos(limite):
+def encontrar_primos_gemelos(limite, marcas=None):
     """
     Encuentra todos los pares de primos gemelos hasta un límite dado.
     
+    Salvo (3, 5), todo par de primos gemelos tiene la forma (6k-1, 6k+1),
+    así que solo se criban esas dos clases de candidatos.
+    
     Args:
         limite (int): Límite superior hasta donde buscar primos gemelos
+        marcas (numpy.ndarray, opcional): Array booleano que se reutiliza
+            para la criba si tiene al menos tam_marcas(limite) elementos;
+            si no, se reserva uno nuevo
         
     Returns:
-        list: Lista de tuplas, cada una conteniendo un par de primos gemelos
+        numpy.ndarray: Array de forma (N, 2) con un par de primos gemelos
+            por fila, int32 si limite < 2³¹ e int64 en otro caso
     """
-    primos = generar_primos(limite)
-    gemelos = []
+    # Usamos el entero más estrecho que representa todos los pares
+    tipo = np.int32 if limite < 2**31 else np.int64
+    
+    if limite < 5:
+        return np.empty((0, 2), dtype=tipo)
+    
+    # La posición k representa a 6k-1 en una clase y a 6k+1 en la otra
+    n = tam_marcas(limite) // 2
+    if marcas is None or marcas.size < 2 * n:
+        marcas = np.empty(2 * n, dtype=bool)
+    menos_uno = marcas[:n]
+    mas_uno = marcas[n:2 * n]
+    marcas[:2 * n] = True
+    
+    # Cribamos con los primos hasta la raíz, salvo 2 y 3, que nunca
+    # dividen a un candidato
+    for p in generar_primos(isqrt(limite))[2:]:
+        p = int(p)
+        # 6k-1 es múltiplo de p cuando k ≡ 6⁻¹ (mod p) y 6k+1 cuando k ≡ -6⁻¹
+        inverso = pow(6, -1, p)
+        # Empezamos en torno a p², lejos del propio p
+        inicio = (p * p - 1) // 6
+        menos_uno[inicio + (inverso - inicio) % p::p] = False
+        mas_uno[inicio + (-inverso - inicio) % p::p] = False
+    
+    # Un par gemelo es una posición primo en ambas clases; k = 0 no es válido
+    es_gemelo = menos_uno & mas_uno
+    es_gemelo[0] = False
+    primeros = 6 * np.flatnonzero(es_gemelo) - 1
+    
+    # Rellenamos un único array de pares, empezando por (3, 5)
+    gemelos = np.empty((len(primeros) + 1, 2), dtype=tipo)
+    gemelos[0] = (3, 5)
+    gemelos[1:, 0] = primeros
+    gemelos[1:, 1] = primeros + 2
     
-    for i in range(len(primos) - 1):
-        if primos[i + 1] - primos[i] == 2:
-            gemelos.append((primos[i], primos[i + 1]))
-            
     return gemelos
 
 def visualizar_recta_numerica(gemelos, limite):
@@ -77,25 +160,27 @@ def visualizar_recta_numerica(gemelos, limite):
     Visualiza los primos gemelos como puntos conectados en una recta numérica.
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
         limite (int): Límite superior usado para generar los primos
     """
+    import matplotlib.pyplot as plt
+    
     plt.figure(figsize=(12, 4))
     
     # Dibujar la recta numérica
     plt.axhline(y=0, color='black', linestyle='-', alpha=0.3)
     
-    # Marcar las posiciones de cada 10 unidades
-    for i in range(0, limite + 1, 10):
-        plt.axvline(x=i, color='gray', linestyle='--', alpha=0.2)
-        plt.text(i, -0.15, str(i), ha='center')
+    # Marcar las posiciones de cada 10 unidades con un único artista y
+    # etiquetar como mucho 20 de ellas en el eje x
+    marcas = np.arange(0, limite + 1, 10)
+    plt.vlines(marcas, -0.5, 0.5, colors='gray', linestyles='--', alpha=0.2)
+    plt.xticks(marcas[::(len(marcas) + 19) // 20])
     
-    # Dibujar los primos gemelos
-    for par in gemelos:
-        # Dibujamos los puntos
-        plt.plot([par[0], par[1]], [0, 0], 'ro', markersize=6)
-        # Conectamos con una línea
-        plt.plot([par[0], par[1]], [0, 0], 'r-', linewidth=2)
+    # Dibujar los primos gemelos con un único trazo: cada par es un
+    # segmento con sus dos puntos, separado del siguiente por un NaN
+    pares = np.asarray(gemelos, dtype=float).reshape(-1, 2)
+    xs = np.column_stack((pares, np.full(len(pares), np.nan))).ravel()
+    plt.plot(xs, np.zeros_like(xs), 'r-o', markersize=6, linewidth=2)
     
     plt.title(f'Primos Gemelos hasta {limite} en la Recta Numérica')
     plt.ylim(-0.5, 0.5)
@@ -112,15 +197,17 @@ def visualizar_dispersion(gemelos, limite):
     El eje x representa el primer primo del par, y el eje y la diferencia (que siempre es 2).
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
         limite (int): Límite superior usado para generar los primos
     """
+    import matplotlib.pyplot as plt
+    
     plt.figure(figsize=(12, 6))
     
     # Extraer los primeros primos de cada par
-    primeros_primos = [par[0] for par in gemelos]
+    primeros_primos = np.asarray(gemelos).reshape(-1, 2)[:, 0]
     # La diferencia siempre es 2
-    diferencias = [2] * len(gemelos)
+    diferencias = np.full(len(primeros_primos), 2)
     
     plt.scatter(primeros_primos, diferencias, color='blue', s=50, alpha=0.7)
     plt.title(f'Distribución de Primos Gemelos hasta {limite}')
@@ -137,15 +224,15 @@ def visualizar_patron_espiral(gemelos, limite):
     Visualiza los primos gemelos en una espiral, mostrando patrones interesantes.
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
         limite (int): Límite superior usado para generar los primos
     """
+    import matplotlib.pyplot as plt
+    
     plt.figure(figsize=(10, 10))
     
     # Extraer todos los primos que forman parte de pares gemelos
-    primos_en_pares = []
-    for par in gemelos:
-        primos_en_pares.extend(par)
+    primos_en_pares = np.asarray(gemelos).ravel()
     
     # Generar coordenadas para la espiral (espiral de Arquímedes)
     theta = np.sqrt(np.arange(1, limite + 1))
@@ -155,10 +242,9 @@ def visualizar_patron_espiral(gemelos, limite):
     # Dibujar todos los números en la espiral (puntos pequeños y grises)
     plt.scatter(x, y, color='lightgray', s=10, alpha=0.3)
     
-    # Resaltar los primos gemelos
-    for primo in primos_en_pares:
-        if primo <= limite:
-            plt.scatter(x[primo-1], y[primo-1], color='red', s=50, alpha=0.8)
+    # Resaltar los primos gemelos con una sola llamada
+    indices = primos_en_pares[primos_en_pares <= limite] - 1
+    plt.scatter(x[indices], y[indices], color='red', s=50, alpha=0.8)
     
     plt.title(f'Espiral de Primos Gemelos hasta {limite}')
     plt.axis('equal')
@@ -168,28 +254,56 @@ def visualizar_patron_espiral(gemelos, limite):
     plt.savefig('primos_gemelos_espiral.png')
     plt.show()
 
+def histograma_distancias(distancias, bins=20):
+    """
+    Agrupa las distancias en intervalos de igual ancho entero a partir de
+    su recuento exacto con np.bincount, sin la búsqueda por intervalos
+    de np.histogram.
+    
+    Args:
+        distancias (numpy.ndarray): Distancias enteras no negativas
+        bins (int): Cantidad máxima de intervalos
+        
+    Returns:
+        tuple: (bordes, frecuencias), con un borde más que frecuencias
+    """
+    if len(distancias) == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    
+    # Recuento exacto de cada distancia a partir de la mínima
+    minimo = distancias.min()
+    conteos = np.bincount(distancias - minimo)
+    
+    # Sumamos los recuentos de cada grupo de `ancho` distancias consecutivas
+    ancho = -(-len(conteos) // bins)
+    frecuencias = np.add.reduceat(conteos, np.arange(0, len(conteos), ancho))
+    bordes = minimo + ancho * np.arange(len(frecuencias) + 1)
+    
+    return bordes, frecuencias
+
 def visualizar_histograma_distancias(gemelos):
     """
     Visualiza un histograma de las distancias entre pares consecutivos de primos gemelos.
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
     """
+    import matplotlib.pyplot as plt
+    
     # Si hay menos de 2 pares, no podemos calcular distancias
     if len(gemelos) < 2:
         print("No hay suficientes pares de primos gemelos para crear el histograma de distancias.")
         return
     
-    # Calcular las distancias entre pares consecutivos
-    distancias = []
-    for i in range(len(gemelos) - 1):
-        # La distancia es la diferencia entre el primer primo del siguiente par
-        # y el primer primo del par actual
-        distancia = gemelos[i+1][0] - gemelos[i][0]
-        distancias.append(distancia)
+    # Calcular las distancias entre pares consecutivos: la diferencia entre
+    # el primer primo del siguiente par y el primer primo del par actual
+    distancias = np.diff(np.asarray(gemelos)[:, 0])
+    
+    bordes, frecuencias = histograma_distancias(distancias, bins=20)
     
     plt.figure(figsize=(12, 6))
-    plt.hist(distancias, bins=20, color='skyblue', edgecolor='black')
+    plt.bar(bordes[:-1], frecuencias, width=np.diff(bordes), align='edge',
+            color='skyblue', edgecolor='black')
     plt.title('Histograma de Distancias entre Pares Consecutivos de Primos Gemelos')
     plt.xlabel('Distancia')
     plt.ylabel('Frecuencia')
@@ -198,29 +312,57 @@ def visualizar_histograma_distancias(gemelos):
     plt.savefig('primos_gemelos_histograma.png')
     plt.show()
 
+def regresion_lineal(valores):
+    """
+    Ajusta la recta de mínimos cuadrados de los valores frente a su
+    índice 0, 1, ..., n-1 con las sumas en forma cerrada, sin SciPy.
+    
+    Args:
+        valores (numpy.ndarray): Valores a ajustar, por ejemplo distancias
+        
+    Returns:
+        tuple: (pendiente, intercepto, coeficiente_correlacion)
+    """
+    y = np.asarray(valores, dtype=np.float64)
+    n = len(y)
+    
+    # Para x = 0..n-1 las sumas de x y de x² tienen fórmula cerrada
+    sx = n * (n - 1) / 2
+    sxx = n * (n - 1) * (2 * n - 1) / 6
+    sy = y.sum()
+    syy = y @ y
+    sxy = np.arange(n, dtype=np.float64) @ y
+    
+    var_x = n * sxx - sx * sx
+    var_y = n * syy - sy * sy
+    cov = n * sxy - sx * sy
+    
+    # Con un solo punto o valores constantes no hay pendiente ni correlación
+    pendiente = cov / var_x if var_x > 0 else 0.0
+    intercepto = (sy - pendiente * sx) / n
+    r = cov / np.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else 0.0
+    
+    return pendiente, intercepto, r
+
 def visualizar_tendencia(gemelos, limite):
     """
     Visualiza la tendencia en las distancias entre pares consecutivos de primos gemelos.
     
     Args:
-        gemelos (list): Lista de tuplas con pares de primos gemelos
+        gemelos (numpy.ndarray): Array (N, 2) con pares de primos gemelos
         limite (int): Límite superior usado para generar los primos
     """
+    import matplotlib.pyplot as plt
+    
     # Si hay menos de 2 pares, no podemos calcular distancias
     if len(gemelos) < 2:
         print("No hay suficientes pares de primos gemelos para analizar la tendencia.")
         return
     
-    # Calcular las distancias entre pares consecutivos
-    distancias = []
-    indices = []
-    
-    for i in range(len(gemelos) - 1):
-        # La distancia es la diferencia entre el primer primo del siguiente par
-        # y el primer primo del par actual
-        distancia = gemelos[i+1][0] - gemelos[i][0]
-        distancias.append(distancia)
-        indices.append(i)
+    # Calcular las distancias entre pares consecutivos: la diferencia entre
+    # el primer primo del siguiente par y el primer primo del par actual
+    distancias = np.diff(np.asarray(gemelos)[:, 0])
+    indices = np.arange(len(distancias))
     
     plt.figure(figsize=(12, 6))
     
@@ -228,23 +370,17 @@ def visualizar_tendencia(gemelos, limite):
     plt.scatter(indices, distancias, color='blue', s=40, alpha=0.7)
     
     # Calcular la línea de tendencia
-    try:
-        from scipy import stats
-        pendiente, intercepto, r_valor, p_valor, error_std = stats.linregress(
-            indices, distancias)
-        
-        # Línea de tendencia
-        x = np.array(indices)
-        y = intercepto + pendiente * x
-        plt.plot(x, y, 'r-', linewidth=2, 
-                label=f'Tendencia: y = {pendiente:.4f}x + {intercepto:.2f}')
-        
-        # Añadir texto con coeficiente de correlación
-        plt.text(0.05, 0.95, f'Correlación: {r_valor:.4f}', 
-                transform=plt.gca().transAxes, fontsize=12,
-                verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
-    except ImportError:
-        print("Nota: La librería scipy no está instalada. No se mostrará la línea de tendencia.")
+    pendiente, intercepto, r_valor = regresion_lineal(distancias)
+    
+    # Línea de tendencia
+    y = intercepto + pendiente * indices
+    plt.plot(indices, y, 'r-', linewidth=2, 
+            label=f'Tendencia: y = {pendiente:.4f}x + {intercepto:.2f}')
+    
+    # Añadir texto con coeficiente de correlación
+    plt.text(0.05, 0.95, f'Correlación: {r_valor:.4f}', 
+            transform=plt.gca().transAxes, fontsize=12,
+            verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
     
     plt.title('Tendencia en las Distancias entre Primos Gemelos')
     plt.xlabel('Índice del Par')
@@ -273,19 +409,23 @@ def menu():
         except ValueError:
             print("Por favor, introduce un número entero válido.")
     
+    # Para la consola usamos la GPU si hay una disponible y el límite lo
+    # merece, y en otro caso la criba optimizada con mapas de bits
+    from optimizado import encontrar_primos_gemelos_gpu
+    
     print(f"\nGenerando primos gemelos hasta {limite}...")
     inicio = time()
-    gemelos = encontrar_primos_gemelos(limite)
+    gemelos = encontrar_primos_gemelos_gpu(limite)
     fin = time()
     
     print(f"Se encontraron {len(gemelos)} pares de primos gemelos en {fin-inicio:.2f} segundos.")
     
-    if gemelos:
+    if len(gemelos):
         print("\nPares de primos gemelos encontrados:")
-        for i, par in enumerate(gemelos):
-            # Convertir los valores np.int64 a enteros normales
-            par_limpio = (int(par[0]), int(par[1]))
-            print(f"{i+1}. {par_limpio}")
+        # Convertimos a enteros de Python una sola vez, al imprimir
+        pares = zip(gemelos[:, 0].tolist(), gemelos[:, 1].tolist())
+        for i, par in enumerate(pares):
+            print(f"{i+1}. {par}")
     
     while True:
         print("\n" + "-"*50)
@@ -7,17 +7,174 @@ facilitar la visualización y análisis de los números primos gemelos.
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import threading
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import numpy as np
 import time
-import csv
+import os
+import signal
+from math import isqrt
 
 # Importamos nuestros módulos
-from gemelos import encontrar_primos_gemelos, visualizar_recta_numerica, visualizar_dispersion
-from optimizado import encontrar_primos_gemelos_optimizado, comparar_rendimiento
-from estadisticas import visualizar_analisis_completo
+from gemelos import encontrar_primos_gemelos, regresion_lineal, tam_marcas
+from optimizado import encontrar_primos_gemelos_optimizado, contar_primos, limpiar_cache_gemelos
+
+# Matplotlib se importa la primera vez que hace falta dibujar (_ensure_mpl),
+# para que la ventana aparezca sin esperar a cargarlo
+plt = None
+FigureCanvasTkAgg = None
+LineCollection = None
+
+# A partir de este límite el fondo de la espiral se dibuja como una imagen
+UMBRAL_ESPIRAL_IMAGEN = 50_000
+
+# Máximo de pares que se listan en el área de resultados
+MAX_PARES_MOSTRADOS = 5000
+
+# Filas que se codifican juntas al exportar a CSV, y bloques que se
+# escriben en cada llamada al sistema
+FILAS_POR_BLOQUE_CSV = 4096
+BLOQUES_POR_ESCRITURA = 8
+
+# Cada cuántos milisegundos comprobamos si terminó la generación, y como
+# mucho cada cuántos se refresca la barra de estado
+INTERVALO_SONDEO_MS = 50
+INTERVALO_ESTADO_MS = 50
+
+# Memoria estimada (1 GiB) a partir de la cual pedimos confirmación
+LIMITE_MEMORIA_BYTES = 1 << 30
+
+def estimar_memoria(limite, metodo):
+    """
+    Estima la memoria que necesita generar los primos gemelos hasta un
+    límite con un método: unos 16 bytes por par, con unos 1.32·n/ln²(n)
+    pares según la conjetura de Hardy-Littlewood, más la criba. El método
+    optimizado criba por segmentos de tamaño fijo; el básico criba de una
+    vez las dos clases 6k±1 (un byte por cada tres números) y las combina
+    en otro array de la mitad de tamaño.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        metodo (str): "básico" u "optimizado"
+        
+    Returns:
+        int: Bytes estimados
+    """
+    pares_estimados = 1.32 * limite / np.log(limite) ** 2 if limite > 2 else 0
+    criba = tam_marcas(limite) * 3 // 2 if metodo == "básico" else 0
+    return criba + int(pares_estimados) * 16
+
+def _registrar_trabajador(pid_trabajador):
+    """
+    Inicializa el proceso auxiliar guardando su pid en un valor compartido,
+    para que la interfaz pueda terminarlo al cerrar la ventana.
+    
+    Args:
+        pid_trabajador (multiprocessing.Value): Entero compartido con la interfaz
+    """
+    pid_trabajador.value = os.getpid()
+
+def _generar_en_proceso(metodo, limite):
+    """
+    Genera los primos gemelos en el proceso auxiliar y mide el tiempo
+    empleado allí, sin contar la comunicación con la interfaz.
+    
+    Args:
+        metodo (str): "básico" u "optimizado"
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        
+    Returns:
+        tuple: (pares como numpy.ndarray de forma (N, 2), límite, segundos)
+    """
+    # El proceso auxiliar vive toda la sesión: vaciamos la caché de pares
+    # para medir siempre una criba completa, como comparar_rendimiento
+    limpiar_cache_gemelos()
+    inicio = time.time()
+    
+    if metodo == "básico":
+        gemelos = encontrar_primos_gemelos(limite)
+    else:
+        gemelos = encontrar_primos_gemelos_optimizado(limite)
+    
+    # Devolvemos una matriz compacta, que se serializa mucho más rápido
+    # que una lista de tuplas; conservamos el tipo de los pares (int32 por
+    # debajo de 2³¹), que ocupa la mitad que int64 al enviarlo a la interfaz
+    gemelos = np.ascontiguousarray(gemelos).reshape(-1, 2)
+    return gemelos, limite, time.time() - inicio
+
+def _ensure_mpl():
+    """Importa Matplotlib y su integración con Tk si aún no se había hecho."""
+    global plt, FigureCanvasTkAgg, LineCollection
+    
+    if plt is None:
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.collections import LineCollection
+
+def _bloques_csv(pares):
+    """
+    Genera el CSV de los pares como bloques de bytes ya codificados, con
+    el mismo formato (con fin de línea CRLF) que csv.writer.
+    
+    Args:
+        pares (numpy.ndarray): Matriz (N, 2) de pares de primos gemelos
+        
+    Yields:
+        bytes: Encabezado y después bloques de FILAS_POR_BLOQUE_CSV filas
+    """
+    yield "Índice,Primer Primo,Segundo Primo,Diferencia\r\n".encode('utf-8')
+    
+    # Construimos cada bloque con NumPy y lo convertimos a listas de una vez,
+    # sin convertir todos los pares a la vez
+    for inicio in range(0, len(pares), FILAS_POR_BLOQUE_CSV):
+        bloque = pares[inicio:inicio + FILAS_POR_BLOQUE_CSV]
+        indices = np.arange(inicio + 1, inicio + len(bloque) + 1)
+        tabla = np.column_stack((indices, bloque, bloque[:, 1] - bloque[:, 0]))
+        filas = "".join(f"{i},{p},{q},{d}\r\n" for i, p, q, d in tabla.tolist())
+        yield filas.encode('utf-8')
+
+def _escribir_bloques(ruta, bloques):
+    """
+    Escribe bloques de bytes en un archivo. Donde existe os.writev (Linux y
+    otros Unix) enviamos BLOQUES_POR_ESCRITURA bloques por llamada al
+    sistema; en otro caso usamos un archivo con búfer de 1 MiB.
+    
+    Args:
+        ruta (str): Ruta del archivo de destino
+        bloques (iterable): Bloques de bytes a escribir en orden
+    """
+    if not hasattr(os, 'writev'):
+        with open(ruta, 'wb', buffering=1 << 20) as archivo:
+            for bloque in bloques:
+                archivo.write(bloque)
+        return
+    
+    def escribir_lote(fd, lote):
+        escritos = os.writev(fd, lote)
+        
+        # writev puede escribir menos de lo pedido: saltamos los bloques ya
+        # escritos y completamos el resto sin copiar ni unir bloques
+        for bloque in lote:
+            if escritos >= len(bloque):
+                escritos -= len(bloque)
+                continue
+            resto = memoryview(bloque)[escritos:]
+            escritos = 0
+            while resto:
+                resto = resto[os.write(fd, resto):]
+    
+    fd = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        lote = []
+        for bloque in bloques:
+            lote.append(bloque)
+            if len(lote) == BLOQUES_POR_ESCRITURA:
+                escribir_lote(fd, lote)
+                lote = []
+        if lote:
+            escribir_lote(fd, lote)
+    finally:
+        os.close(fd)
 
 class PrimosGemelosGUI:
     def __init__(self, root):
@@ -27,10 +184,24 @@ class PrimosGemelosGUI:
         
         # Variables de estado
         self.gemelos = []
+        self._pairs_arr = np.empty((0, 2), dtype=np.int64)
+        self._cache_distancias = None
+        self._num_primos = None
+        self._limite_generado = 0
+        self._metodo_generado = None
         self.limite = tk.IntVar(value=100)
         self.method_var = tk.StringVar(value="optimizado")
         self.visualization_var = tk.StringVar(value="recta")
         
+        # Memoria máxima estimada que aceptamos sin pedir confirmación
+        self.mem_cap = LIMITE_MEMORIA_BYTES
+        
+        # Un proceso auxiliar para cribar sin competir con Tk por el GIL;
+        # al arrancar nos deja su pid para poder terminarlo al cerrar
+        self._pid_trabajador = multiprocessing.Value('i', 0)
+        self._pool = ProcessPoolExecutor(max_workers=1, initializer=_registrar_trabajador,
+                                         initargs=(self._pid_trabajador,))
+        
         # Configuración general
         self.root.configure(bg="#f0f0f0")
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -45,8 +216,8 @@ class PrimosGemelosGUI:
         
         # Entrada para el límite
         ttk.Label(control_frame, text="Límite:").grid(row=0, column=0, padx=5, pady=5)
-        limite_entry = ttk.Entry(control_frame, textvariable=self.limite, width=10)
-        limite_entry.grid(row=0, column=1, padx=5, pady=5)
+        self._limite_entry = ttk.Entry(control_frame, textvariable=self.limite, width=10)
+        self._limite_entry.grid(row=0, column=1, padx=5, pady=5)
         
         # Selector de método
         ttk.Label(control_frame, text="Método:").grid(row=0, column=2, padx=5, pady=5)
@@ -91,10 +262,15 @@ class PrimosGemelosGUI:
         self.graph_frame = ttk.LabelFrame(main_paned, text="Visualización")
         main_paned.add(self.graph_frame, weight=2)
         
-        # Inicialmente vacío, se llenará con gráficos
+        # La figura y el lienzo se crean en la primera visualización
+        self._fig = None
+        self._ax = None
+        self._canvas = None
         
         # Barra de estado inferior
         self.status_var = tk.StringVar(value="Listo")
+        self._pending_status = "Listo"
+        self._status_scheduled = False
         status_bar = ttk.Label(self.root, textvariable=self.status_var, 
                          relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
@@ -102,126 +278,209 @@ class PrimosGemelosGUI:
     def generar_primos(self):
         """Genera los primos gemelos según el método seleccionado."""
         try:
-            limite = self.limite.get()
+            # Leemos el texto de la entrada directamente: IntVar.get lanza
+            # TclError si no es un número
+            try:
+                limite = int(self._limite_entry.get())
+            except ValueError:
+                messagebox.showerror("Error", "El límite debe ser un número entero.")
+                return
+            
             if limite <= 0:
                 messagebox.showerror("Error", "El límite debe ser un número positivo.")
                 return
-                
-            self.status_var.set("Generando primos gemelos...")
-            self.root.update_idletasks()
             
-            # Usar un hilo para no bloquear la interfaz
-            def generate_thread():
-                start_time = time.time()
-                
-                if self.method_var.get() == "básico":
-                    self.gemelos = encontrar_primos_gemelos(limite)
-                else:
-                    self.gemelos = encontrar_primos_gemelos_optimizado(limite)
-                    
-                elapsed = time.time() - start_time
+            metodo = self.method_var.get()
+            memoria = estimar_memoria(limite, metodo)
+            if memoria > self.mem_cap:
+                continuar = messagebox.askyesno(
+                    "Límite muy grande",
+                    f"Generar primos gemelos hasta {limite} necesitará unos "
+                    f"{memoria / 2**20:.0f} MiB de memoria. ¿Quieres continuar?")
+                if not continuar:
+                    return
                 
-                # Actualizar resultados en el hilo principal
-                self.root.after(0, lambda: self.mostrar_resultados(elapsed))
+            self._set_status("Generando primos gemelos...")
             
-            thread = threading.Thread(target=generate_thread)
-            thread.daemon = True
-            thread.start()
+            # Generar en el proceso auxiliar para no bloquear la interfaz
+            futuro = self._pool.submit(_generar_en_proceso, metodo, limite)
+            self.root.after(INTERVALO_SONDEO_MS, lambda: self._comprobar_generacion(futuro, metodo))
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al generar primos gemelos: {str(e)}")
-            self.status_var.set("Error en la generación")
+            self._set_status("Error en la generación")
+    
+    def _set_status(self, texto):
+        """
+        Cambia el texto de la barra de estado agrupando los cambios
+        cercanos: solo se refresca una vez cada INTERVALO_ESTADO_MS.
+        """
+        self._pending_status = texto
+        if not self._status_scheduled:
+            self._status_scheduled = True
+            self.root.after(INTERVALO_ESTADO_MS, self._flush_status)
+    
+    def _flush_status(self):
+        """Muestra en la barra de estado el último texto pedido."""
+        self._status_scheduled = False
+        self.status_var.set(self._pending_status)
+    
+    def _comprobar_generacion(self, futuro, metodo):
+        """
+        Comprueba desde el bucle de Tk si terminó la generación y, cuando
+        termina, guarda los pares y muestra los resultados.
+        """
+        if not futuro.done():
+            self.root.after(INTERVALO_SONDEO_MS, lambda: self._comprobar_generacion(futuro, metodo))
+            return
+        
+        try:
+            gemelos, limite, elapsed = futuro.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al generar primos gemelos: {str(e)}")
+            self._set_status("Error en la generación")
+            return
+        
+        # Los pares ya llegan como matriz contigua; guardamos el límite y el
+        # método con los que se generaron, que pueden no coincidir ya con
+        # los de la entrada y el selector
+        self.gemelos = gemelos
+        self._limite_generado = limite
+        self._metodo_generado = metodo
+        self._pairs_arr = gemelos
+        self._cache_distancias = None
+        self._num_primos = None
+        
+        self.mostrar_resultados(elapsed)
+    
+    def _distancias(self):
+        """
+        Devuelve las distancias entre pares consecutivos de primos gemelos,
+        calculándolas solo la primera vez tras cada generación.
+        
+        Las distancias son pequeñas, así que las guardamos como int32 y se
+        usan así en todos los cálculos y gráficos.
+        """
+        if self._cache_distancias is None:
+            self._cache_distancias = np.diff(self._pairs_arr[:, 0]).astype(np.int32)
+        return self._cache_distancias
+    
+    def _comprobar_conteo(self, futuro, pares):
+        """
+        Comprueba desde el bucle de Tk si terminó el conteo de primos y,
+        cuando termina, lo guarda y abre las estadísticas. Si entretanto
+        se generaron otros pares, el conteo ya no les corresponde.
+        """
+        if not futuro.done():
+            self.root.after(INTERVALO_SONDEO_MS, lambda: self._comprobar_conteo(futuro, pares))
+            return
+        
+        try:
+            num_primos = futuro.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al contar los primos: {str(e)}")
+            self._set_status("Error en las estadísticas")
+            return
+        
+        if pares is self._pairs_arr:
+            self._num_primos = num_primos
+            self.mostrar_estadisticas()
     
     def mostrar_resultados(self, tiempo):
         """Muestra los resultados en el área de texto."""
         self.result_text.delete(1.0, tk.END)
         
-        self.result_text.insert(tk.END, f"Primos gemelos hasta {self.limite.get()}\n")
-        self.result_text.insert(tk.END, f"Método: {self.method_var.get()}\n")
+        self.result_text.insert(tk.END, f"Primos gemelos hasta {self._limite_generado}\n")
+        self.result_text.insert(tk.END, f"Método: {self._metodo_generado}\n")
         self.result_text.insert(tk.END, f"Tiempo de generación: {tiempo:.4f} segundos\n")
         self.result_text.insert(tk.END, f"Total de pares encontrados: {len(self.gemelos)}\n\n")
         
         if len(self.gemelos) > 0:
             self.result_text.insert(tk.END, "Pares de primos gemelos encontrados:\n")
-            # Convertir los valores de NumPy a enteros normales para mostrarlos de forma más limpia
-            for i, par in enumerate(self.gemelos):
-                # Convertir los valores np.int64 a enteros normales
-                par_limpio = (int(par[0]), int(par[1]))
-                self.result_text.insert(tk.END, f"{i+1}. {par_limpio}\n")
-        
-        self.status_var.set(f"Generación completada: {len(self.gemelos)} pares encontrados")
+            # Convertimos los pares a enteros de Python de una vez para
+            # mostrarlos de forma más limpia, y los insertamos en una sola
+            # llamada; los pares completos siguen en self._pairs_arr
+            pares = self._pairs_arr[:MAX_PARES_MOSTRADOS].tolist()
+            lineas = [f"{i+1}. {tuple(par)}\n" for i, par in enumerate(pares)]
+            if len(self._pairs_arr) > MAX_PARES_MOSTRADOS:
+                lineas.append(f"... (truncado: se muestran los primeros {MAX_PARES_MOSTRADOS} pares; "
+                              "exporta a CSV para verlos todos)\n")
+            self.result_text.insert(tk.END, "".join(lineas))
+        
+        self._set_status(f"Generación completada: {len(self.gemelos)} pares encontrados")
+    
+    def _crear_figura(self):
+        """
+        Crea la figura y el lienzo que se reutilizan en cada visualización,
+        importando Matplotlib si hace falta.
+        """
+        _ensure_mpl()
+        self._fig = plt.Figure(figsize=(6, 4), dpi=100)
+        self._ax = self._fig.add_subplot(111)
+        self._canvas = FigureCanvasTkAgg(self._fig, master=self.graph_frame)
+        self._canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
     
     def visualizar(self):
         """Visualiza los primos gemelos según el método seleccionado."""
-        if not self.gemelos:
+        if len(self.gemelos) == 0:
             messagebox.showinfo("Información", "Primero debes generar los primos gemelos.")
             return
-            
-        self.status_var.set("Generando visualización...")
-        self.root.update_idletasks()
-        
-        # Limpiar el frame de gráficos
-        for widget in self.graph_frame.winfo_children():
-            widget.destroy()
-        
-        # Crear una figura para matplotlib
-        fig = plt.Figure(figsize=(6, 4), dpi=100)
-        ax = fig.add_subplot(111)
         
+        if self._fig is None:
+            self._crear_figura()
+            
         # Diferentes visualizaciones
         tipo_visual = self.visualization_var.get()
-        limite = self.limite.get()
+        limite = self._limite_generado
+        
+        if tipo_visual in ("tendencia", "histograma") and len(self._distancias()) == 0:
+            messagebox.showinfo("Información", "No hay suficientes pares para calcular distancias.")
+            return
+            
+        self._set_status("Generando visualización...")
+        
+        # Reutilizamos la figura persistente: solo limpiamos sus ejes
+        ax = self._ax
+        ax.cla()
+        # cla no deshace la proporción fija que deja la espiral
+        ax.set_aspect('auto', adjustable='box')
         
         try:
             if tipo_visual == "recta":
                 # Dibujar la recta numérica
                 ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
                 
-                # Marcar las posiciones de cada 10 unidades
-                for i in range(0, limite + 1, max(1, limite // 10)):
-                    ax.axvline(x=i, color='gray', linestyle='--', alpha=0.2)
-                    ax.text(i, -0.15, str(i), ha='center')
+                # Marcar las posiciones de cada 10 unidades con las marcas y
+                # la rejilla del propio eje
+                ax.set_xticks(np.arange(0, limite + 1, max(1, limite // 10)))
                 
-                # Dibujar los primos gemelos
-                for par in self.gemelos:
-                    # Dibujamos los puntos
-                    ax.plot([par[0], par[1]], [0, 0], 'ro', markersize=6)
-                    # Conectamos con una línea
-                    ax.plot([par[0], par[1]], [0, 0], 'r-', linewidth=2)
+                # Dibujar los primos gemelos: un segmento por par y todos
+                # los puntos en una sola llamada
+                pares = self._pairs_arr
+                segmentos = np.dstack((pares, np.zeros_like(pares)))
+                ax.add_collection(LineCollection(segmentos, colors='r', linewidths=2))
+                ax.scatter(pares.ravel(), np.zeros(pares.size), c='r', s=36, zorder=3)
                 
                 ax.set_title(f'Primos Gemelos hasta {limite} en la Recta Numérica')
                 ax.set_ylim(-0.5, 0.5)
                 ax.set_xlim(-1, limite + 1)
-                ax.grid(False)
+                ax.grid(True, axis='x', color='gray', linestyle='--', alpha=0.2)
                 ax.set_yticks([])
                 
             elif tipo_visual == "tendencia":
                 # Calculamos distancias entre pares consecutivos
-                distancias = []
-                indices = []
-                
-                for i in range(len(self.gemelos) - 1):
-                    distancia = self.gemelos[i+1][0] - self.gemelos[i][0]
-                    distancias.append(distancia)
-                    indices.append(i)
-                
-                if not distancias:
-                    messagebox.showinfo("Información", "No hay suficientes pares para calcular distancias.")
-                    self.status_var.set("Listo")
-                    return
+                distancias = self._distancias()
+                indices = np.arange(len(distancias))
                 
                 # Calcular estadísticas y línea de tendencia
-                from scipy import stats
-                pendiente, intercepto, r_valor, p_valor, error_std = stats.linregress(
-                    indices, distancias)
+                pendiente, intercepto, r_valor = regresion_lineal(distancias)
                 
                 # Visualizar como scatter plot con línea de tendencia
                 ax.scatter(indices, distancias, color='blue', s=35, alpha=0.7)
                 
                 # Línea de tendencia
-                x = np.array(indices)
-                y = intercepto + pendiente * x
-                ax.plot(x, y, 'r-', linewidth=2, 
+                y = intercepto + pendiente * indices
+                ax.plot(indices, y, 'r-', linewidth=2, 
                        label=f'Tendencia: y = {pendiente:.4f}x + {intercepto:.2f}')
                 
                 ax.set_title(f'Tendencia en las Distancias entre Primos Gemelos hasta {limite}')
@@ -236,23 +495,27 @@ class PrimosGemelosGUI:
                        verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
                 
             elif tipo_visual == "espiral":
-                # Extraer todos los primos que forman parte de pares gemelos
-                primos_en_pares = []
-                for par in self.gemelos:
-                    primos_en_pares.extend(par)
+                # Posiciones (base 0) de todos los primos que forman parte de pares gemelos
+                indices = self._pairs_arr.ravel()
+                indices = indices[indices <= limite] - 1
                 
                 # Generar coordenadas para la espiral (espiral de Arquímedes)
                 theta = np.sqrt(np.arange(1, limite + 1))
                 x = theta * np.cos(theta)
                 y = theta * np.sin(theta)
                 
-                # Dibujar todos los números en la espiral (puntos pequeños y grises)
-                ax.scatter(x, y, color='lightgray', s=10, alpha=0.3)
+                # Dibujar todos los números en la espiral (puntos pequeños y grises);
+                # con muchos puntos los rasterizamos en una sola imagen
+                if limite > UMBRAL_ESPIRAL_IMAGEN:
+                    ocupadas, bordes_x, bordes_y = np.histogram2d(x, y, bins=800)
+                    ax.imshow(ocupadas.T > 0, extent=[bordes_x[0], bordes_x[-1], bordes_y[0], bordes_y[-1]],
+                              origin='lower', cmap='Greys', alpha=0.3, interpolation='nearest')
+                else:
+                    ax.scatter(x, y, color='lightgray', s=10, alpha=0.3)
                 
-                # Resaltar los primos gemelos
-                for primo in primos_en_pares:
-                    if primo <= limite:
-                        ax.scatter(x[primo-1], y[primo-1], color='red', s=50, alpha=0.8)
+                # Resaltar los primos gemelos reutilizando las coordenadas ya calculadas
+                resaltados = ax.scatter(x[indices], y[indices], color='red', s=50, alpha=0.8)
+                resaltados.set_rasterized(True)
                 
                 ax.set_title(f'Espiral de Primos Gemelos hasta {limite}')
                 ax.axis('equal')
@@ -261,21 +524,13 @@ class PrimosGemelosGUI:
                 
             elif tipo_visual == "histograma":
                 # Calculamos distancias entre pares consecutivos
-                distancias = []
-                for i in range(len(self.gemelos) - 1):
-                    distancia = self.gemelos[i+1][0] - self.gemelos[i][0]
-                    distancias.append(distancia)
-                
-                if not distancias:
-                    messagebox.showinfo("Información", "No hay suficientes pares para calcular distancias.")
-                    self.status_var.set("Listo")
-                    return
+                distancias = self._distancias()
                 
                 # Calculamos estadísticas
-                media = np.mean(distancias)
+                media = distancias.mean()
                 mediana = np.median(distancias)
                 
-                bins = max(10, min(20, int(np.sqrt(len(distancias)))))
+                bins = max(10, min(20, isqrt(len(distancias))))
                 ax.hist(distancias, bins=bins, color='orange', alpha=0.7, edgecolor='black')
                 ax.axvline(x=media, color='red', linestyle='--', 
                           label=f'Media: {media:.2f}')
@@ -288,73 +543,73 @@ class PrimosGemelosGUI:
                 ax.legend()
                 ax.grid(True, alpha=0.3)
             
-            # Agregar el gráfico al frame
-            canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            # Redibujamos el lienzo existente cuando Tk quede libre
+            self._canvas.draw_idle()
             
-            self.status_var.set(f"Visualización '{tipo_visual}' generada correctamente")
+            self._set_status(f"Visualización '{tipo_visual}' generada correctamente")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al generar visualización: {str(e)}")
-            self.status_var.set("Error en la visualización")
+            self._set_status("Error en la visualización")
     
     def mostrar_estadisticas(self):
         """Muestra estadísticas sobre los primos gemelos."""
-        if not self.gemelos:
+        if len(self.gemelos) == 0:
             messagebox.showinfo("Información", "Primero debes generar los primos gemelos.")
             return
-            
+        
         # Analizar las distancias entre pares consecutivos
-        distancias = []
-        for i in range(len(self.gemelos) - 1):
-            distancia = self.gemelos[i+1][0] - self.gemelos[i][0]
-            distancias.append(distancia)
+        distancias = self._distancias()
+        indices = np.arange(len(distancias))
             
-        if not distancias:
+        if len(distancias) == 0:
             messagebox.showinfo("Información", "No hay suficientes pares para calcular estadísticas.")
             return
+        
+        # La proporción necesita contar todos los primos: lo hacemos una vez
+        # por generación en el proceso auxiliar y volvemos aquí al terminar
+        if self._metodo_generado == "optimizado" and self._num_primos is None:
+            self._set_status("Contando primos...")
+            futuro = self._pool.submit(contar_primos, self._limite_generado)
+            pares = self._pairs_arr
+            self.root.after(INTERVALO_SONDEO_MS, lambda: self._comprobar_conteo(futuro, pares))
+            return
+        
+        _ensure_mpl()
             
         # Calcular estadísticas
-        media = np.mean(distancias)
-        mediana = np.median(distancias)
-        desviacion = np.std(distancias)
-        maximo = max(distancias)
-        minimo = min(distancias)
-        
-        # Calcular cuartiles y percentiles relevantes
-        q1 = np.percentile(distancias, 25)
-        q3 = np.percentile(distancias, 75)
+        media = distancias.mean()
+        desviacion = distancias.std()
+        
+        # Calcular extremos, cuartiles y percentiles relevantes ordenando una sola vez
+        minimo, q1, mediana, q3, p90, p99, maximo = np.quantile(
+            distancias, [0, 0.25, 0.5, 0.75, 0.9, 0.99, 1])
+        minimo, maximo = int(minimo), int(maximo)
         rango_iqr = q3 - q1
-        p90 = np.percentile(distancias, 90)
-        p99 = np.percentile(distancias, 99)
         
-        # Calcular la moda (valor más frecuente)
-        from collections import Counter
-        contador = Counter(distancias)
-        moda = contador.most_common(1)[0][0]
-        freq_moda = contador.most_common(1)[0][1]
+        # Calcular la moda (valor más frecuente): las distancias son enteros
+        # positivos pequeños, así que basta con contarlas con bincount
+        frecuencias = np.bincount(distancias)
+        moda = int(frecuencias.argmax())
+        freq_moda = int(frecuencias[moda])
         
-        # Análisis de tendencia
-        from scipy import stats
-        pendiente, intercepto, r_valor, p_valor, error_std = stats.linregress(
-            range(len(distancias)), distancias)
+        # Análisis de tendencia, calculado una vez para todas las pestañas
+        pendiente, intercepto, r_valor = regresion_lineal(distancias)
         
         # Calcular proporción respecto a primos
-        if self.method_var.get() == "optimizado":
-            from optimizado import criba_eratostenes
-            todos_primos = criba_eratostenes(self.limite.get())
-            proporcion = len(self.gemelos) * 2 / len(todos_primos)
+        if self._metodo_generado == "optimizado":
+            num_primos = self._num_primos
+            proporcion = len(self.gemelos) * 2 / num_primos
             
             # Calcular densidad estimada según la teoría
-            limite = self.limite.get()
+            limite = self._limite_generado
             C = 0.66  # Constante de los primos gemelos
             densidad_teorica = C * limite / (np.log(limite) ** 2) / limite * 100
         else:
             # Si no usamos el método optimizado, no calculamos estos valores
             proporcion = 0
             densidad_teorica = 0
-            todos_primos = []
+            num_primos = 0
         
         # Crear una ventana más grande para las estadísticas
         stats_window = tk.Toplevel(self.root)
@@ -375,12 +630,12 @@ class PrimosGemelosGUI:
         stats_text.insert(tk.END, "ESTADÍSTICAS DE PRIMOS GEMELOS\n")
         stats_text.insert(tk.END, "=" * 40 + "\n\n")
         stats_text.insert(tk.END, f"Número total de pares: {len(self.gemelos)}\n")
-        stats_text.insert(tk.END, f"Límite de búsqueda: {self.limite.get()}\n\n")
+        stats_text.insert(tk.END, f"Límite de búsqueda: {self._limite_generado}\n\n")
         
         stats_text.insert(tk.END, "DISTRIBUCIÓN\n")
         stats_text.insert(tk.END, "-" * 40 + "\n")
-        stats_text.insert(tk.END, f"• Primer par: {(int(self.gemelos[0][0]), int(self.gemelos[0][1]))}\n")
-        stats_text.insert(tk.END, f"• Último par: {(int(self.gemelos[-1][0]), int(self.gemelos[-1][1]))}\n\n")
+        stats_text.insert(tk.END, f"• Primer par: {tuple(self._pairs_arr[0].tolist())}\n")
+        stats_text.insert(tk.END, f"• Último par: {tuple(self._pairs_arr[-1].tolist())}\n\n")
         
         stats_text.insert(tk.END, "DISTANCIAS ENTRE PARES CONSECUTIVOS\n")
         stats_text.insert(tk.END, "-" * 40 + "\n")
@@ -407,50 +662,44 @@ class PrimosGemelosGUI:
         stats_text.insert(tk.END, "DENSIDAD Y PROPORCIÓN\n")
         stats_text.insert(tk.END, "-" * 40 + "\n")
         # Densidad global (pares por cada 100 números)
-        densidad = len(self.gemelos) * 100 / self.limite.get()
+        densidad = len(self.gemelos) * 100 / self._limite_generado
         stats_text.insert(tk.END, f"• Densidad observada: {densidad:.4f} pares por cada 100 números\n")
         
-        if self.method_var.get() == "optimizado":
+        if self._metodo_generado == "optimizado":
             stats_text.insert(tk.END, f"• Densidad teórica estimada: {densidad_teorica:.4f} pares por cada 100 números\n")
             stats_text.insert(tk.END, f"• Diferencia con teoría: {((densidad-densidad_teorica)/densidad_teorica*100):.2f}%\n\n")
             stats_text.insert(tk.END, f"• Proporción de primos en pares gemelos: {proporcion:.4f}\n")
-            stats_text.insert(tk.END, f"• Cantidad de primos: {len(todos_primos)}\n")
-            stats_text.insert(tk.END, f"• Primos en pares gemelos: {len(self.gemelos)*2} ({(len(self.gemelos)*2/len(todos_primos)*100):.2f}%)\n")
+            stats_text.insert(tk.END, f"• Cantidad de primos: {num_primos}\n")
+            stats_text.insert(tk.END, f"• Primos en pares gemelos: {len(self.gemelos)*2} ({(len(self.gemelos)*2/num_primos*100):.2f}%)\n")
         
-        # Pestaña 2: Histograma de distancias
+        # Pestaña 2: los tres gráficos comparten una sola figura y un solo lienzo
         tab2 = ttk.Frame(notebook)
-        notebook.add(tab2, text="Histograma")
+        notebook.add(tab2, text="Gráficos")
         
-        fig1 = plt.Figure(figsize=(7, 5), dpi=100)
-        ax1 = fig1.add_subplot(111)
+        fig = plt.Figure(figsize=(7, 5), dpi=100)
+        rejilla = fig.add_gridspec(2, 2)
+        ax1 = fig.add_subplot(rejilla[0, 0])
+        ax2 = fig.add_subplot(rejilla[0, 1])
+        ax3 = fig.add_subplot(rejilla[1, :])
         
-        bins = max(10, min(30, int(np.sqrt(len(distancias)))))
+        # Histograma de distancias
+        bins = max(10, min(30, isqrt(len(distancias))))
         ax1.hist(distancias, bins=bins, color='skyblue', alpha=0.7, edgecolor='black')
         ax1.axvline(x=media, color='red', linestyle='--', label=f'Media: {media:.2f}')
         ax1.axvline(x=mediana, color='green', linestyle='-', label=f'Mediana: {mediana:.2f}')
         ax1.axvline(x=moda, color='purple', linestyle=':', label=f'Moda: {moda}')
         
-        ax1.set_title('Distribución de Distancias entre Pares Consecutivos')
+        ax1.set_title('Distribución de Distancias')
         ax1.set_xlabel('Distancia')
         ax1.set_ylabel('Frecuencia')
-        ax1.legend()
+        ax1.legend(fontsize='small')
         ax1.grid(True, alpha=0.3)
         
-        canvas1 = FigureCanvasTkAgg(fig1, master=tab2)
-        canvas1.draw()
-        canvas1.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        # Pestaña 3: Box Plot
-        tab3 = ttk.Frame(notebook)
-        notebook.add(tab3, text="Box Plot")
-        
-        fig2 = plt.Figure(figsize=(7, 5), dpi=100)
-        ax2 = fig2.add_subplot(111)
-        
+        # Box Plot
         ax2.boxplot(distancias, vert=False, patch_artist=True, 
                    boxprops=dict(facecolor='lightblue'))
         
-        ax2.set_title('Box Plot de Distancias entre Pares de Primos Gemelos')
+        ax2.set_title('Box Plot de Distancias')
         ax2.set_xlabel('Distancia')
         ax2.grid(True, alpha=0.3, axis='x')
         
@@ -461,26 +710,14 @@ class PrimosGemelosGUI:
             f"Media: {media:.2f}, Desv. Est.: {desviacion:.2f}"
         )
         ax2.text(0.5, 0.01, stats_text, horizontalalignment='center',
-                verticalalignment='bottom', transform=ax2.transAxes)
-        
-        canvas2 = FigureCanvasTkAgg(fig2, master=tab3)
-        canvas2.draw()
-        canvas2.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        # Pestaña 4: Tendencia
-        tab4 = ttk.Frame(notebook)
-        notebook.add(tab4, text="Tendencia")
+                verticalalignment='bottom', transform=ax2.transAxes, fontsize='small')
         
-        fig3 = plt.Figure(figsize=(7, 5), dpi=100)
-        ax3 = fig3.add_subplot(111)
-        
-        # Scatter plot
-        ax3.scatter(range(len(distancias)), distancias, alpha=0.5, color='blue')
+        # Tendencia
+        ax3.scatter(indices, distancias, alpha=0.5, color='blue')
         
         # Línea de tendencia
-        x = np.array(range(len(distancias)))
-        y = intercepto + pendiente * x
-        ax3.plot(x, y, 'r-', label=f'Tendencia: y = {pendiente:.4f}x + {intercepto:.2f}')
+        y = intercepto + pendiente * indices
+        ax3.plot(indices, y, 'r-', label=f'Tendencia: y = {pendiente:.4f}x + {intercepto:.2f}')
         
         ax3.set_title('Tendencia en las Distancias de Primos Gemelos')
         ax3.set_xlabel('Índice del Par')
@@ -488,34 +725,49 @@ class PrimosGemelosGUI:
         ax3.legend()
         ax3.grid(True, alpha=0.3)
         
-        canvas3 = FigureCanvasTkAgg(fig3, master=tab4)
-        canvas3.draw()
-        canvas3.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        fig.tight_layout()
         
-        # Si hay un error por no tener scipy, mostramos solo las estadísticas básicas
-        if 'pendiente' not in locals():
-            notebook.hide(tab4)
+        canvas = FigureCanvasTkAgg(fig, master=tab2)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
     
     def limpiar(self):
         """Limpia los resultados y gráficos."""
         self.gemelos = []
+        self._pairs_arr = np.empty((0, 2), dtype=np.int64)
+        self._cache_distancias = None
+        self._num_primos = None
+        self._limite_generado = 0
+        self._metodo_generado = None
         self.result_text.delete(1.0, tk.END)
         
-        for widget in self.graph_frame.winfo_children():
-            widget.destroy()
+        if self._fig is not None:
+            self._ax.cla()
+            self._canvas.draw_idle()
             
-        self.status_var.set("Listo")
+        self._set_status("Listo")
     
     def on_close(self):
         """Maneja el cierre de la ventana."""
         if messagebox.askokcancel("Salir", "¿Estás seguro de que quieres salir?"):
             # Cerrar todas las figuras pendientes de matplotlib
-            plt.close('all')
+            if plt is not None:
+                plt.close('all')
+            # shutdown no detiene una criba en curso, y al salir Python
+            # esperaría a que terminase: terminamos el proceso auxiliar, y
+            # el ejecutor da por fallido lo que quedase pendiente
+            self._pool.shutdown(wait=False)
+            if self._pid_trabajador.value:
+                try:
+                    os.kill(self._pid_trabajador.value, signal.SIGTERM)
+                except OSError:
+                    # El proceso ya había terminado
+                    pass
             self.root.destroy()
             
     def exportar_csv(self):
         """Exporta los primos gemelos generados a un archivo CSV."""
-        if not self.gemelos:
+        if len(self.gemelos) == 0:
             messagebox.showinfo("Información", "No hay primos gemelos para exportar. Primero debes generarlos.")
             return
             
@@ -530,21 +782,15 @@ class PrimosGemelosGUI:
             return
             
         try:
-            with open(filename, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                # Escribir encabezado
-                writer.writerow(["Índice", "Primer Primo", "Segundo Primo", "Diferencia"])
-                
-                # Escribir datos
-                for i, par in enumerate(self.gemelos):
-                    writer.writerow([i+1, int(par[0]), int(par[1]), int(par[1])-int(par[0])])
+            # Escribimos el CSV ya codificado, en pocas llamadas al sistema
+            _escribir_bloques(filename, _bloques_csv(self._pairs_arr))
                     
-            self.status_var.set(f"Primos gemelos exportados a {filename}")
+            self._set_status(f"Primos gemelos exportados a {filename}")
             messagebox.showinfo("Exportación Exitosa", f"Se han exportado {len(self.gemelos)} pares de primos gemelos a:\n{filename}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al exportar archivo CSV: {str(e)}")
-            self.status_var.set("Error en la exportación")
+            self._set_status("Error en la exportación")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -3,90 +3,1212 @@ Versión optimizada del generador de números primos gemelos
 
 Este módulo implementa la Criba de Eratóstenes para encontrar primos 
 de manera más eficiente, lo que permite trabajar con límites mucho más grandes.
+
+Si numba está instalado, los núcleos de la criba se compilan a código
+nativo; en caso contrario se ejecutan como funciones normales de NumPy.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from time import time
+import platform
+from time import perf_counter
+from math import isqrt
+
+try:
+    from numba import njit, prange, get_num_threads
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    NUMBA_DISPONIBLE = False
+    prange = range
+    
+    def get_num_threads():
+        """Sustituto de numba.get_num_threads: sin numba hay un solo hilo."""
+        return 1
+    
+    def njit(*args, **kwargs):
+        """Sustituto de numba.njit que devuelve la función sin compilar."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda funcion: funcion
+
+try:
+    from numba import cuda
+except ImportError:
+    cuda = None
+
+def tipo_entero(limite):
+    """
+    Elige el tipo entero más estrecho capaz de representar los números
+    hasta un límite dado, para reducir la memoria de los arrays de primos.
+    
+    Args:
+        limite (int): Mayor número que se va a representar
+        
+    Returns:
+        type: np.int32 si limite < 2³¹, np.int64 en otro caso
+    """
+    return np.int32 if limite < 2**31 else np.int64
+
+# Restos módulo 30 coprimos con 30: el bit b de cada byte de la rueda
+# representa al número 30·i + RESIDUOS_RUEDA[b]
+RESIDUOS_RUEDA = np.array([1, 7, 11, 13, 17, 19, 23, 29], dtype=np.int64)
+
+# Posición del bit de cada resto módulo 30 (-1 si no es coprimo con 30)
+BIT_RUEDA = np.full(30, -1, dtype=np.int64)
+BIT_RUEDA[RESIDUOS_RUEDA] = np.arange(8)
+
+# Tabla de tachado de la rueda: para un primo p = 30·q + RESIDUOS_RUEDA[a],
+# su múltiplo p·m con m ≡ RESIDUOS_RUEDA[b] (mod 30) y m ≥ p más pequeño es
+# m = p + SALTO_RUEDA[a, b], cae en el byte
+# q·(30·q + 2·RESIDUOS_RUEDA[a] + SALTO_RUEDA[a, b]) + BYTE_RUEDA[a, b]
+# y se tacha con MASCARA_RUEDA[a, b]
+SALTO_RUEDA = (RESIDUOS_RUEDA[None, :] - RESIDUOS_RUEDA[:, None]) % 30
+_productos = RESIDUOS_RUEDA[:, None] * (RESIDUOS_RUEDA[:, None] + SALTO_RUEDA)
+BYTE_RUEDA = _productos // 30
+MASCARA_RUEDA = (~(1 << BIT_RUEDA[_productos % 30]) & 0xFF).astype(np.uint8)
+
+# Para cada valor de un byte, cuántos bits tiene activos y en qué
+# posiciones (de menor a mayor), para recorrer un mapa de bits byte a byte
+POPCOUNT_BYTE = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+POSICIONES_BITS = np.zeros((256, 8), dtype=np.int64)
+for _byte in range(256):
+    _activos = [b for b in range(8) if _byte >> b & 1]
+    POSICIONES_BITS[_byte, :len(_activos)] = _activos
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _tachar_rueda30(bits, raiz, residuos, salto, byte, mascara):
+        """
+        Tacha en el mapa de bits de la rueda módulo 30 los múltiplos de los
+        primos hasta raiz.
+        
+        Args:
+            bits (numpy.ndarray): Mapa de bits uint8 de criba_rueda30
+            raiz (int): Raíz entera del límite
+            residuos (numpy.ndarray): RESIDUOS_RUEDA
+            salto (numpy.ndarray): SALTO_RUEDA
+            byte (numpy.ndarray): BYTE_RUEDA
+            mascara (numpy.ndarray): MASCARA_RUEDA
+        """
+        for q in range(raiz // 30 + 1):
+            for a in range(8):
+                p = 30 * q + residuos[a]
+                if p > raiz:
+                    return
+                if not bits[q] >> a & 1:
+                    continue
+                # Los múltiplos p·m con m en la misma clase módulo 30 avanzan
+                # 30·p números, es decir, p bytes, y caen siempre en el mismo bit
+                for b in range(8):
+                    primero = q * (30 * q + 2 * residuos[a] + salto[a, b]) + byte[a, b]
+                    for i in range(primero, bits.shape[0], p):
+                        bits[i] &= mascara[a, b]
+else:
+    def _tachar_rueda30(bits, raiz, residuos, salto, byte, mascara):
+        """Versión de _tachar_rueda30 vectorizada con NumPy."""
+        for q in range(raiz // 30 + 1):
+            for a in range(8):
+                p = 30 * q + int(residuos[a])
+                if p > raiz:
+                    return
+                if not bits[q] >> a & 1:
+                    continue
+                for b in range(8):
+                    primero = q * (30 * q + 2 * int(residuos[a]) + int(salto[a, b])) + int(byte[a, b])
+                    bits[primero::p] &= mascara[a, b]
+
+# Si la extensión opcional de Cython está compilada (ver criba_ext.pyx),
+# tachamos con ella: es código nativo desde el primer uso, sin esperar a
+# que numba compile
+try:
+    from criba_ext import tachar_rueda30 as _tachar_rueda30_ext
+except ImportError:
+    _tachar_rueda30_ext = None
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _primos_rueda30(bits, residuos, popcount, posiciones, salida):
+        """
+        Escribe en salida, a partir de la posición 3, los números que
+        representan los bits activos del mapa de bits de la rueda.
+        
+        Args:
+            bits (numpy.ndarray): Mapa de bits uint8 de criba_rueda30
+            residuos (numpy.ndarray): RESIDUOS_RUEDA
+            popcount (numpy.ndarray): POPCOUNT_BYTE
+            posiciones (numpy.ndarray): POSICIONES_BITS
+            salida (numpy.ndarray): Array con 3 elementos más que bits activos
+        """
+        cuenta = 3
+        for i in range(bits.shape[0]):
+            byte = bits[i]
+            for j in range(popcount[byte]):
+                salida[cuenta] = 30 * i + residuos[posiciones[byte, j]]
+                cuenta += 1
+else:
+    def _primos_rueda30(bits, residuos, popcount, posiciones, salida):
+        """Versión de _primos_rueda30 vectorizada con NumPy."""
+        posiciones_activas = np.flatnonzero(np.unpackbits(bits, bitorder='little'))
+        salida[3:] = 30 * (posiciones_activas >> 3) + residuos[posiciones_activas & 7]
+
+def criba_rueda30(limite):
+    """
+    Criba de Eratóstenes con rueda módulo 30: solo se almacenan los
+    números coprimos con 2, 3 y 5, a razón de un bit cada uno y ocho
+    por cada bloque de 30 números.
+    
+    Args:
+        limite (int): Límite superior hasta donde cribar
+        
+    Returns:
+        numpy.ndarray: Array uint8 donde el bit b del byte i indica si
+            30·i + RESIDUOS_RUEDA[b] es primo (sin recortar a limite)
+    """
+    bits = np.full(limite // 30 + 1, 0xFF, dtype=np.uint8)
+    
+    # El 1 no es primo
+    bits[0] &= 0xFE
+    
+    tachar = _tachar_rueda30_ext or _tachar_rueda30
+    tachar(bits, isqrt(limite), RESIDUOS_RUEDA, SALTO_RUEDA, BYTE_RUEDA, MASCARA_RUEDA)
+    
+    return bits
+
+def criba_bytearray(limite):
+    """
+    Criba de Eratóstenes en Python puro sobre un bytearray: el tachado no
+    pasa por NumPy ni por numba, solo por asignaciones de slices de bytes.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos
+        
+    Returns:
+        numpy.ndarray: Array con los números primos encontrados
+    """
+    if limite < 2:
+        return np.empty(0, dtype=tipo_entero(limite))
+    
+    marcas = bytearray([1]) * (limite + 1)
+    marcas[0] = marcas[1] = 0
+    
+    for p in range(2, isqrt(limite) + 1):
+        if marcas[p]:
+            marcas[p * p::p] = bytes(len(range(p * p, limite + 1, p)))
+    
+    return np.flatnonzero(np.frombuffer(marcas, dtype=np.uint8)).astype(tipo_entero(limite))
+
+# Por debajo de este límite criba_bytearray es más rápida que la rueda:
+# con numba, solo para límites muy pequeños, en los que pesa el coste de
+# cada llamada; sin numba, la rueda paga un bucle en Python por cada primo
+# y la criba sobre bytearray le gana hasta el millón
+UMBRAL_BYTEARRAY = 500 if NUMBA_DISPONIBLE else 10**6
+
+# En PyPy no hay numba, y su JIT compila el bucle de criba_bytearray mucho
+# mejor que las llamadas a NumPy de la criba con rueda, que en PyPy pasan
+# por la capa de compatibilidad con la API de C
+EN_PYPY = platform.python_implementation() == 'PyPy'
 
 def criba_eratostenes(limite):
     """
     Implementación de la Criba de Eratóstenes para encontrar todos los
     números primos hasta un límite dado de manera eficiente.
     
+    Usa la rueda módulo 30 de criba_rueda30, que evita almacenar y tachar
+    los múltiplos de 2, 3 y 5; por debajo de UMBRAL_BYTEARRAY, y siempre
+    en PyPy, usa criba_bytearray.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos
+        
+    Returns:
+        numpy.ndarray: Array con los números primos encontrados
+    """
+    if EN_PYPY or limite < UMBRAL_BYTEARRAY:
+        return criba_bytearray(limite)
+    
+    bits = criba_rueda30(limite)
+    
+    # Convertimos cada bit activo en el número que representa, precedidos
+    # de 2, 3 y 5, que la rueda no representa
+    # La tabla es uint8 para que el array intermedio ocupe lo mismo que el
+    # mapa de bits; acumulamos la suma en int64
+    primos = np.empty(3 + int(POPCOUNT_BYTE[bits].sum(dtype=np.int64)), dtype=tipo_entero(limite))
+    primos[:3] = (2, 3, 5)
+    _primos_rueda30(bits, RESIDUOS_RUEDA, POPCOUNT_BYTE, POSICIONES_BITS, primos)
+    
+    # El último byte puede representar números mayores que el límite
+    return primos[:np.searchsorted(primos, limite, side='right')]
+
+def contar_primos(limite):
+    """
+    Cuenta los primos hasta un límite dado con la criba de criba_rueda30,
+    sumando los bits activos del mapa de bits en lugar de construir la
+    lista de primos.
+    
+    Args:
+        limite (int): Límite superior hasta donde contar primos
+        
+    Returns:
+        int: Cantidad de primos menores o iguales que limite
+    """
+    if EN_PYPY or limite < UMBRAL_BYTEARRAY:
+        return len(criba_bytearray(limite))
+    
+    bits = criba_rueda30(limite)
+    
+    # Apagamos los bits del último byte que representan números mayores que
+    # el límite; los restos están en orden, así que son los bits más altos
+    bits[-1] &= (1 << int(np.searchsorted(RESIDUOS_RUEDA, limite % 30, side='right'))) - 1
+    
+    # 2, 3 y 5 no están en la rueda
+    return 3 + int(POPCOUNT_BYTE[bits].sum(dtype=np.int64))
+
+# Tamaño por defecto de cada segmento: 256 KiB, para que el segmento
+# permanezca en la caché L2 mientras lo recorren todos los primos base
+TAM_SEGMENTO = 1 << 18
+
+# Impares por segmento de las cribas con mapas de bits: con un bit por impar, el
+# segmento ocupa 32 KiB y cabe en la caché L1 mientras se criba
+TAM_SEGMENTO_BITS = 1 << 18
+
+# Segmentos que se criban en paralelo en cada lote de la criba paralela
+SEGMENTOS_POR_LOTE = 64
+
+# A partir de este límite merece la pena cribar en la GPU; los segmentos
+# de la GPU son mucho mayores porque viven en la memoria del dispositivo
+UMBRAL_GPU = 10**8
+TAM_SEGMENTO_GPU = 1 << 24
+HILOS_POR_BLOQUE = 256
+
+# Precriba: los múltiplos de 3, 5, 7, 11 y 13 forman un patrón que se
+# repite cada 3·5·7·11·13 = 15015 impares, así que cada segmento empieza
+# copiando el patrón en lugar de tachar esos primos, los que más múltiplos
+# tienen. PRECRIBA_IMPARES guarda un byte por impar y PRECRIBA_BITS un bit
+# por impar; este último ocupa 15015 bytes para que cada byte empiece
+# siempre en el mismo punto del patrón
+PRIMOS_PRECRIBA = np.array([3, 5, 7, 11, 13], dtype=np.int64)
+_impares = 2 * np.arange(8 * 15015) + 1
+_libres = np.ones(_impares.size, dtype=np.uint8)
+for _p in PRIMOS_PRECRIBA:
+    _libres[_impares % _p == 0] = 0
+PRECRIBA_IMPARES = _libres[:15015].copy()
+PRECRIBA_BITS = np.packbits(_libres, bitorder='little')
+
+# Los impares 1, 3, ..., 15 tal como deben quedar en el primer segmento: la
+# precriba tacha los propios primos precribados y el 1 no es primo
+PRIMEROS_IMPARES = np.array([0, 1, 1, 1, 0, 1, 1, 0], dtype=np.uint8)
+PRIMER_BYTE_PRECRIBA = np.packbits(PRIMEROS_IMPARES, bitorder='little')[0]
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _precribar(segmento, desplazamiento, patron):
+        """
+        Rellena un segmento con copias consecutivas de un patrón de precriba.
+        
+        Args:
+            segmento (numpy.ndarray): Array uint8 que se sobrescribe
+            desplazamiento (int): Posición del patrón (módulo su longitud) que
+                corresponde al primer elemento del segmento
+            patron (numpy.ndarray): PRECRIBA_IMPARES o PRECRIBA_BITS
+        """
+        j = 0
+        posicion = desplazamiento % len(patron)
+        while j < len(segmento):
+            m = min(len(segmento) - j, len(patron) - posicion)
+            # Copiamos entre vistas con un bucle simple, que numba convierte
+            # en una copia vectorizada
+            destino = segmento[j:j + m]
+            origen = patron[posicion:posicion + m]
+            for k in range(m):
+                destino[k] = origen[k]
+            j += m
+            posicion = 0
+else:
+    def _precribar(segmento, desplazamiento, patron):
+        """Versión de _precribar que copia el patrón por tramos con NumPy."""
+        j = 0
+        posicion = desplazamiento % len(patron)
+        while j < len(segmento):
+            m = min(len(segmento) - j, len(patron) - posicion)
+            segmento[j:j + m] = patron[posicion:posicion + m]
+            j += m
+            posicion = 0
+
+@njit(cache=True)
+def _iniciar_segmento_bits(bits, inicio, precribar):
+    """
+    Prepara el mapa de bits de un segmento de impares antes de cribarlo.
+    
+    Args:
+        bits (numpy.ndarray): Mapa de bits uint8 que se sobrescribe
+        inicio (int): Posición del primer impar del segmento
+        precribar (bool): Si se copia la precriba, que exige que inicio sea
+            múltiplo de 8; si no, todos los bits quedan a 1
+    """
+    if precribar:
+        _precribar(bits, inicio // 8, PRECRIBA_BITS)
+        if inicio == 0:
+            bits[0] = PRIMER_BYTE_PRECRIBA
+    else:
+        bits[:] = 0xFF
+        # El 1 (posición 0) no es primo
+        if inicio == 0:
+            bits[0] = 0xFE
+
+def _primos_sin_precriba(primos_base, precribar):
+    """
+    Devuelve cuántos de los primeros primos base ya tacha la precriba.
+    
+    Args:
+        primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+        precribar (bool): Si los segmentos se precriban
+        
+    Returns:
+        int: Posición del primer primo base que hay que tachar
+    """
+    if not precribar:
+        return 0
+    return int(np.searchsorted(primos_base, PRIMOS_PRECRIBA[-1], side='right'))
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _cribar_segmento_impares(segmento, inicio, primos_base):
+        """
+        Tacha los múltiplos de los primos base impares dentro de un segmento
+        en el que la posición k representa al impar 2·(inicio + k) + 1.
+        
+        Args:
+            segmento (numpy.ndarray): Array uint8 del segmento, modificado in situ
+            inicio (int): Posición del primer impar del segmento
+            primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+        """
+        menor = 2 * inicio + 1
+        mayor = menor + 2 * (len(segmento) - 1)
+        for p in primos_base:
+            cuadrado = p * p
+            if cuadrado > mayor:
+                break
+            # Primer múltiplo impar de p dentro del segmento
+            primero = max(cuadrado, -(-menor // p) * p)
+            if primero % 2 == 0:
+                primero += p
+            # Entre dos múltiplos impares consecutivos de p hay p posiciones;
+            # el bucle explícito se compila a escrituras de un byte sin pasar
+            # por la maquinaria de los slices
+            for k in range((primero - menor) // 2, len(segmento), p):
+                segmento[k] = 0
+else:
+    def _cribar_segmento_impares(segmento, inicio, primos_base):
+        """Versión de _cribar_segmento_impares vectorizada con NumPy."""
+        menor = 2 * inicio + 1
+        mayor = menor + 2 * (len(segmento) - 1)
+        for p in primos_base:
+            cuadrado = p * p
+            if cuadrado > mayor:
+                break
+            primero = max(cuadrado, -(-menor // p) * p)
+            if primero % 2 == 0:
+                primero += p
+            segmento[(primero - menor) // 2::p] = 0
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _gemelos_segmento_impares(segmento, inicio, primos_base, salida):
+        """
+        Criba un segmento de impares y, en la misma llamada, lo recorre una
+        sola vez escribiendo en salida el primer primo de cada par gemelo.
+        
+        Args:
+            segmento (numpy.ndarray): Array uint8 del segmento, modificado in situ
+            inicio (int): Posición del primer impar del segmento
+            primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            salida (numpy.ndarray): Array donde se escriben los primeros primos
+            
+        Returns:
+            int: Cantidad de pares escritos en salida
+        """
+        _cribar_segmento_impares(segmento, inicio, primos_base)
+        
+        # Un par gemelo son dos impares consecutivos que siguen marcados
+        n = 0
+        for k in range(len(segmento) - 1):
+            if segmento[k] & segmento[k + 1]:
+                salida[n] = 2 * (inicio + k) + 1
+                n += 1
+        
+        return n
+else:
+    def _gemelos_segmento_impares(segmento, inicio, primos_base, salida):
+        """Versión de _gemelos_segmento_impares vectorizada con NumPy."""
+        _cribar_segmento_impares(segmento, inicio, primos_base)
+        
+        indices = np.flatnonzero(segmento[:-1] & segmento[1:])
+        salida[:len(indices)] = 2 * (inicio + indices) + 1
+        
+        return len(indices)
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente):
+        """
+        Tacha los múltiplos de los primos base en un segmento de impares
+        guardado como mapa de bits, en el que el bit k (bit k % 8 del byte
+        k // 8) representa al impar 2·(inicio + k) + 1.
+        
+        Args:
+            bits (numpy.ndarray): Mapa de bits uint8 del segmento, modificado in situ
+            inicio (int): Posición del primer impar del segmento
+            n (int): Cantidad de impares del segmento
+            primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            siguiente (numpy.ndarray): Posición del siguiente múltiplo impar de
+                cada primo base por tachar; se actualiza para el próximo segmento
+        """
+        fin = inicio + n
+        for i in range(len(primos_base)):
+            p = primos_base[i]
+            # Los primos cuyo cuadrado queda más allá del segmento aún no tachan nada
+            if (p * p - 1) // 2 >= fin:
+                break
+            k = siguiente[i]
+            while k < fin:
+                bits[(k - inicio) >> 3] &= np.uint8(~(1 << ((k - inicio) & 7)) & 0xFF)
+                k += p
+            siguiente[i] = k
+else:
+    def _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente):
+        """Versión de _tachar_segmento_bits que criba un byte por impar con NumPy."""
+        segmento = np.unpackbits(bits, count=n, bitorder='little')
+        
+        fin = inicio + n
+        for i, p in enumerate(primos_base):
+            if (p * p - 1) // 2 >= fin:
+                break
+            k = siguiente[i]
+            if k < fin:
+                segmento[k - inicio::p] = 0
+                siguiente[i] = k + p * -(-(fin - k) // p)
+        
+        bits[:(n + 7) // 8] = np.packbits(segmento, bitorder='little')
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _primos_segmento_bits(bits, inicio, n, primos_base, siguiente, salida):
+        """
+        Criba un segmento de impares guardado como mapa de bits (ver
+        _tachar_segmento_bits) y escribe en salida los primos que quedan.
+        
+        Args:
+            bits (numpy.ndarray): Mapa de bits uint8 del segmento, con todos
+                los bits a 1 y modificado in situ
+            inicio (int): Posición del primer impar del segmento
+            n (int): Cantidad de impares del segmento
+            primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            siguiente (numpy.ndarray): Siguiente múltiplo de cada primo base
+            salida (numpy.ndarray): Array de al menos n elementos
+            
+        Returns:
+            int: Cantidad de primos escritos en salida
+        """
+        _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente)
+        
+        # Recorremos el mapa byte a byte con las tablas de bits activos
+        cuenta = 0
+        for b in range(len(bits)):
+            byte = bits[b]
+            for j in range(POPCOUNT_BYTE[byte]):
+                k = 8 * b + POSICIONES_BITS[byte, j]
+                if k < n:
+                    salida[cuenta] = 2 * (inicio + k) + 1
+                    cuenta += 1
+        
+        return cuenta
+else:
+    def _primos_segmento_bits(bits, inicio, n, primos_base, siguiente, salida):
+        """Versión de _primos_segmento_bits vectorizada con NumPy."""
+        _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente)
+        
+        indices = np.flatnonzero(np.unpackbits(bits, count=n, bitorder='little'))
+        salida[:len(indices)] = 2 * (inicio + indices) + 1
+        
+        return len(indices)
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _gemelos_segmento_bits(bits, inicio, n, primos_base, siguiente, anterior, salida):
+        """
+        Criba un segmento de impares guardado como mapa de bits y escribe en
+        salida el primer primo de cada par gemelo, sin pasar por la lista de
+        primos: un par son dos bits consecutivos activos.
+        
+        Args:
+            bits (numpy.ndarray): Mapa de bits uint8 del segmento, de un número
+                entero de palabras de 64 bits, con los bits de relleno a 0 y
+                modificado in situ
+            inicio (int): Posición del primer impar del segmento
+            n (int): Cantidad de impares del segmento
+            primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            siguiente (numpy.ndarray): Siguiente múltiplo de cada primo base
+            anterior (bool): Si el último impar del segmento anterior es primo
+            salida (numpy.ndarray): Array donde se escriben los primeros primos
+            
+        Returns:
+            int: Cantidad de pares escritos en salida
+        """
+        _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente)
+        
+        # Par que cruza la frontera con el segmento anterior
+        cuenta = 0
+        if anterior and bits[0] & 1:
+            salida[0] = 2 * inicio - 1
+            cuenta = 1
+        
+        # Leemos el mapa en palabras de 64 bits (en little-endian, el bit k de
+        # la palabra w es el impar 64·w + k): cada palabra se combina con ella
+        # misma desplazada un bit, completada con el primer bit de la siguiente,
+        # y así se comprueban 64 candidatos a la vez
+        palabras = bits.view(np.uint64)
+        ultima = len(palabras) - 1
+        for w in range(len(palabras)):
+            vecinos = palabras[w] >> np.uint64(1)
+            if w < ultima:
+                vecinos |= palabras[w + 1] << np.uint64(63)
+            pares = palabras[w] & vecinos
+            
+            # Solo las palabras con algún par se recorren byte a byte
+            if pares:
+                for b in range(8):
+                    byte = (pares >> np.uint64(8 * b)) & np.uint64(0xFF)
+                    for j in range(POPCOUNT_BYTE[byte]):
+                        salida[cuenta] = 2 * (inicio + 64 * w + 8 * b + POSICIONES_BITS[byte, j]) + 1
+                        cuenta += 1
+        
+        return cuenta
+else:
+    def _gemelos_segmento_bits(bits, inicio, n, primos_base, siguiente, anterior, salida):
+        """Versión de _gemelos_segmento_bits vectorizada con NumPy."""
+        _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente)
+        
+        cuenta = 0
+        if anterior and bits[0] & 1:
+            salida[0] = 2 * inicio - 1
+            cuenta = 1
+        
+        # Las mismas operaciones sobre palabras de 64 bits, para todo el
+        # segmento a la vez
+        palabras = bits.view('<u8')
+        vecinos = palabras >> np.uint64(1)
+        vecinos[:-1] |= palabras[1:] << np.uint64(63)
+        pares = (palabras & vecinos).view(np.uint8)
+        
+        indices = np.flatnonzero(np.unpackbits(pares, bitorder='little'))
+        salida[cuenta:cuenta + len(indices)] = 2 * (inicio + indices) + 1
+        
+        return cuenta + len(indices)
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _contar_pares_bits(bits, anterior):
+        """
+        Cuenta los pares gemelos de un segmento ya cribado de mapa de bits,
+        con las mismas operaciones por palabras que _gemelos_segmento_bits
+        pero sin escribir los pares.
+        
+        Args:
+            bits (numpy.ndarray): Mapa de bits uint8 del segmento, de un número
+                entero de palabras de 64 bits, con los bits de relleno a 0
+            anterior (bool): Si el último impar del segmento anterior es primo
+            
+        Returns:
+            int: Cantidad de pares del segmento, incluido el que cruza la frontera
+        """
+        cuenta = 0
+        if anterior and bits[0] & 1:
+            cuenta = 1
+        
+        palabras = bits.view(np.uint64)
+        ultima = len(palabras) - 1
+        for w in range(len(palabras)):
+            vecinos = palabras[w] >> np.uint64(1)
+            if w < ultima:
+                vecinos |= palabras[w + 1] << np.uint64(63)
+            pares = palabras[w] & vecinos
+            
+            # Cada iteración apaga el bit activo más bajo
+            while pares:
+                pares &= pares - np.uint64(1)
+                cuenta += 1
+        
+        return cuenta
+else:
+    def _contar_pares_bits(bits, anterior):
+        """Versión de _contar_pares_bits vectorizada con NumPy."""
+        palabras = bits.view('<u8')
+        vecinos = palabras >> np.uint64(1)
+        vecinos[:-1] |= palabras[1:] << np.uint64(63)
+        pares = (palabras & vecinos).view(np.uint8)
+        
+        return int(bool(anterior and bits[0] & 1)) + int(POPCOUNT_BYTE[pares].sum(dtype=np.int64))
+
+if NUMBA_DISPONIBLE:
+    @njit(cache=True)
+    def _primeros_multiplos(inicio, primos_base):
+        """
+        Calcula, para un segmento que empieza en el impar de posición inicio,
+        la posición del primer múltiplo impar de cada primo base que hay que
+        tachar, nunca menor que p².
+        
+        Args:
+            inicio (int): Posición del primer impar del segmento
+            primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            
+        Returns:
+            numpy.ndarray: Posiciones int64, una por primo base
+        """
+        menor = 2 * inicio + 1
+        siguiente = np.empty_like(primos_base)
+        for i in range(len(primos_base)):
+            p = primos_base[i]
+            primero = max(p * p, -(-menor // p) * p)
+            if primero % 2 == 0:
+                primero += p
+            siguiente[i] = (primero - 1) // 2
+        
+        return siguiente
+else:
+    def _primeros_multiplos(inicio, primos_base):
+        """Versión de _primeros_multiplos vectorizada con NumPy."""
+        menor = 2 * inicio + 1
+        primero = np.maximum(primos_base * primos_base, -(-menor // primos_base) * primos_base)
+        primero += (primero % 2 == 0) * primos_base
+        
+        return (primero - 1) // 2
+
+@njit(parallel=True, cache=True)
+def _primos_lote_paralelo(inicio_lote, n_impares, tam_segmento, primos_base,
+                          precribar, segmentos_por_grupo, salida, conteos):
+    """
+    Criba en paralelo un lote de segmentos consecutivos de impares en mapas
+    de bits; cada segmento escribe sus primos en su propia fila de salida.
+    
+    Cada hilo criba un grupo de segmentos consecutivos: calcula el primer
+    múltiplo de cada primo base solo al empezar el grupo y, como en una
+    criba secuencial, lo arrastra de un segmento al siguiente.
+    
+    Args:
+        inicio_lote (int): Posición del primer impar del lote
+        n_impares (int): Cantidad total de impares hasta el límite
+        tam_segmento (int): Cantidad de impares por segmento
+        primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            que no tacha la precriba
+        precribar (bool): Si los segmentos empiezan con la precriba
+        segmentos_por_grupo (int): Segmentos consecutivos que criba cada hilo
+        salida (numpy.ndarray): Array 2D con una fila por segmento del lote
+        conteos (numpy.ndarray): Cantidad de primos escritos en cada fila
+    """
+    n_segmentos = salida.shape[0]
+    for g in prange(-(-n_segmentos // segmentos_por_grupo)):
+        primero = g * segmentos_por_grupo
+        siguiente = _primeros_multiplos(inicio_lote + primero * tam_segmento, primos_base)
+        for s in range(primero, min(primero + segmentos_por_grupo, n_segmentos)):
+            inicio = inicio_lote + s * tam_segmento
+            conteos[s] = 0
+            if inicio < n_impares:
+                n = min(tam_segmento, n_impares - inicio)
+                bits = np.empty((n + 7) // 8, dtype=np.uint8)
+                _iniciar_segmento_bits(bits, inicio, precribar)
+                # _primos_segmento_bits deja en siguiente los múltiplos
+                # del próximo segmento del grupo
+                conteos[s] = _primos_segmento_bits(bits, inicio, n, primos_base,
+                                                   siguiente, salida[s])
+
+def criba_segmentada_paralela(limite, tam_segmento=TAM_SEGMENTO_BITS):
+    """
+    Criba de Eratóstenes por segmentos: en lugar de un único array de
+    tamaño limite + 1, se criban bloques de tam_segmento números impares
+    usando solo los primos hasta la raíz cuadrada del límite.
+    
+    Los pares no se almacenan y cada impar ocupa un solo bit, de modo que
+    un segmento de 32 KiB, que cabe en la caché L1, abarca más de medio
+    millón de números. Los segmentos se criban por lotes, repartiendo
+    cada lote en paralelo, con numba.prange, en tantos grupos de
+    segmentos consecutivos como hilos; dentro de un grupo cada primo base
+    recuerda su siguiente múltiplo de un segmento al siguiente, sin volver
+    a calcularlo con una división.
+    
+    Sin numba los segmentos se criban uno tras otro.
+    
     Args:
         limite (int): Límite superior hasta donde buscar primos
+        tam_segmento (int): Cantidad de impares por segmento
         
     Returns:
-        list: Lista de números primos encontrados
+        numpy.ndarray: Array con los números primos encontrados
     """
-    # Creamos un array booleano para marcar los números primos
-    # Inicialmente asumimos que todos son primos (True)
-    es_primo = np.ones(limite + 1, dtype=bool)
+    primos_base = criba_eratostenes(isqrt(limite))[1:].astype(np.int64)
+    tipo = tipo_entero(limite)
+    n_impares = (limite + 1) // 2
     
-    # 0 y 1 no son primos
-    es_primo[0] = es_primo[1] = False
+    # El 2 es el único primo par
+    primos = [np.arange(2, min(limite, 2) + 1, dtype=tipo)]
     
-    # Aplicamos la criba
-    for i in range(2, int(np.sqrt(limite)) + 1):
-        if es_primo[i]:
-            # Marcamos como no primos todos los múltiplos de i
-            # empezando desde i*i (los anteriores ya fueron marcados)
-            es_primo[i*i:limite+1:i] = False
+    if n_impares:
+        precribar = tam_segmento % 8 == 0
+        primos_base = primos_base[_primos_sin_precriba(primos_base, precribar):]
+        
+        # De cada tres impares consecutivos, uno es múltiplo de 3: un
+        # segmento tiene como mucho dos tercios de primos, más el propio 3
+        segmentos_por_lote = min(SEGMENTOS_POR_LOTE, -(-n_impares // tam_segmento))
+        salida = np.empty((segmentos_por_lote, 2 * tam_segmento // 3 + 2), dtype=tipo)
+        conteos = np.empty(segmentos_por_lote, dtype=np.int64)
+        segmentos_por_grupo = -(-segmentos_por_lote // get_num_threads())
+        
+        for inicio_lote in range(0, n_impares, segmentos_por_lote * tam_segmento):
+            _primos_lote_paralelo(inicio_lote, n_impares, tam_segmento, primos_base,
+                                  precribar, segmentos_por_grupo, salida, conteos)
+            for s in range(segmentos_por_lote):
+                primos.append(salida[s, :conteos[s]].copy())
     
-    # Convertimos el array booleano a lista de números primos
-    return np.where(es_primo)[0]
+    return np.concatenate(primos)
 
-def encontrar_primos_gemelos_optimizado(limite):
+# Caché monótona de criba_gemelos: guarda los primeros primos de los pares
+# hasta el mayor límite cribado, y cualquier límite menor o igual se
+# resuelve recortando ese array en lugar de volver a cribar
+_cache_gemelos = {'limite': -1, 'primeros': None}
+
+def limpiar_cache_gemelos():
+    """
+    Vacía la caché de criba_gemelos, de modo que la siguiente llamada
+    vuelva a cribar desde cero.
+    """
+    _cache_gemelos['limite'] = -1
+    _cache_gemelos['primeros'] = None
+
+def _leer_cache_gemelos(limite):
+    """
+    Devuelve los primeros primos de los pares hasta limite si la caché
+    los cubre, o None si hay que cribar.
+    """
+    if limite > _cache_gemelos['limite']:
+        return None
+    
+    # Nos quedamos con los pares cuyo segundo primo no supera el límite
+    primeros = _cache_gemelos['primeros']
+    return primeros[:np.searchsorted(primeros, limite - 2, side='right')]
+
+def _guardar_cache_gemelos(limite, primeros):
+    """
+    Guarda en la caché los primeros primos de los pares hasta limite,
+    sin permitir que se modifiquen desde fuera.
+    """
+    primeros.flags.writeable = False
+    _cache_gemelos['limite'] = limite
+    _cache_gemelos['primeros'] = primeros
+
+def _segmento_gemelos_bits(inicio, n, precribar):
+    """
+    Reserva y prepara el mapa de bits de un segmento para buscar pares
+    gemelos en él.
+    
+    Args:
+        inicio (int): Posición del primer impar del segmento
+        n (int): Cantidad de impares del segmento
+        precribar (bool): Si el segmento empieza con la precriba
+        
+    Returns:
+        numpy.ndarray: Mapa de bits uint8 de palabras de 64 bits completas,
+            con los bits de relleno a 0
+    """
+    bits = np.empty(-(-n // 64) * 8, dtype=np.uint8)
+    _iniciar_segmento_bits(bits, inicio, precribar)
+    
+    # Los bits de relleno no representan ningún impar
+    bits[(n + 7) // 8:] = 0
+    if n & 7:
+        bits[n >> 3] &= (1 << (n & 7)) - 1
+    
+    return bits
+
+def criba_gemelos(limite, tam_segmento=TAM_SEGMENTO_BITS):
+    """
+    Criba los números impares hasta un límite dado por segmentos y extrae
+    los pares de primos gemelos de cada segmento, sin construir la lista
+    de todos los primos.
+    
+    Cada segmento es un mapa de bits de un bit por impar, como en
+    criba_segmentada_paralela, y los pares salen directamente de combinar el mapa
+    con él mismo desplazado un bit.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        tam_segmento (int): Cantidad de impares por segmento
+        
+    Returns:
+        tuple: (primeros, segundos) arrays con el primer y el segundo
+            primo de cada par; primeros puede ser una vista de solo
+            lectura de la caché
+    """
+    # El primer par gemelo es (3, 5)
+    if limite < 5:
+        vacio = np.empty(0, dtype=tipo_entero(limite))
+        return vacio, vacio.copy()
+    
+    primeros = _leer_cache_gemelos(limite)
+    if primeros is not None:
+        return primeros, primeros + 2
+    
+    # El 2 no hace falta: el segmento solo contiene impares
+    primos_base = criba_eratostenes(isqrt(limite))[1:].astype(np.int64)
+    precribar = tam_segmento % 8 == 0
+    primos_base = primos_base[_primos_sin_precriba(primos_base, precribar):]
+    siguiente = (primos_base * primos_base - 1) // 2
+    tipo = tipo_entero(limite)
+    n_impares = (limite + 1) // 2
+    primeros = []
+    
+    # Salvo (3, 5), los pares son (6k-1, 6k+1): como mucho uno por cada
+    # tres impares consecutivos, más el que cruza la frontera
+    salida = np.empty(tam_segmento // 3 + 3, dtype=tipo)
+    anterior = False
+    
+    for inicio in range(0, n_impares, tam_segmento):
+        n = min(tam_segmento, n_impares - inicio)
+        bits = _segmento_gemelos_bits(inicio, n, precribar)
+        cuenta = _gemelos_segmento_bits(bits, inicio, n, primos_base, siguiente,
+                                        anterior, salida)
+        primeros.append(salida[:cuenta].copy())
+        
+        # El último impar del segmento puede formar par con el primero del siguiente
+        anterior = bool(bits[(n - 1) >> 3] >> ((n - 1) & 7) & 1)
+    
+    primeros = np.concatenate(primeros)
+    _guardar_cache_gemelos(limite, primeros)
+    
+    return primeros, primeros + 2
+
+def contar_gemelos(limite, tam_segmento=TAM_SEGMENTO_BITS):
+    """
+    Cuenta los pares de primos gemelos hasta un límite dado con la misma
+    criba que criba_gemelos, pero sin reservar ni escribir los pares.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        tam_segmento (int): Cantidad de impares por segmento
+        
+    Returns:
+        int: Cantidad de pares de primos gemelos
+    """
+    if limite < 5:
+        return 0
+    
+    primeros = _leer_cache_gemelos(limite)
+    if primeros is not None:
+        return len(primeros)
+    
+    primos_base = criba_eratostenes(isqrt(limite))[1:].astype(np.int64)
+    precribar = tam_segmento % 8 == 0
+    primos_base = primos_base[_primos_sin_precriba(primos_base, precribar):]
+    siguiente = (primos_base * primos_base - 1) // 2
+    n_impares = (limite + 1) // 2
+    total = 0
+    anterior = False
+    
+    for inicio in range(0, n_impares, tam_segmento):
+        n = min(tam_segmento, n_impares - inicio)
+        bits = _segmento_gemelos_bits(inicio, n, precribar)
+        _tachar_segmento_bits(bits, inicio, n, primos_base, siguiente)
+        total += _contar_pares_bits(bits, anterior)
+        anterior = bool(bits[(n - 1) >> 3] >> ((n - 1) & 7) & 1)
+    
+    return total
+
+def criba_primos_y_gemelos(limite):
+    """
+    Obtiene todos los primos hasta un límite dado y, de la misma criba,
+    los pares de primos gemelos, para quien necesite ambos sin cribar dos
+    veces.
+    
+    Los pares son los primos consecutivos que se diferencian en 2 y quedan
+    en la caché de criba_gemelos.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos
+        
+    Returns:
+        tuple: (primos, gemelos), con gemelos un array de forma (N, 2) con
+            un par de primos gemelos por fila
+    """
+    primos = criba_segmentada_paralela(limite)
+    
+    primeros = _leer_cache_gemelos(limite)
+    if primeros is None:
+        primeros = primos[:-1][np.diff(primos) == 2]
+        _guardar_cache_gemelos(limite, primeros)
+    
+    return primos, np.column_stack((primeros, primeros + 2))
+
+@njit(parallel=True, cache=True)
+def _gemelos_lote_paralelo(inicio_lote, n_impares, tam_segmento, primos_base,
+                           salida, conteos):
+    """
+    Criba en paralelo un lote de segmentos consecutivos de impares; cada
+    segmento escribe sus pares en su propia fila de salida.
+    
+    Args:
+        inicio_lote (int): Posición del primer impar del lote
+        n_impares (int): Cantidad total de impares hasta el límite
+        tam_segmento (int): Cantidad de impares por segmento
+        primos_base (numpy.ndarray): Primos impares hasta la raíz del límite
+            que no tacha la precriba
+        salida (numpy.ndarray): Array 2D con una fila por segmento del lote
+        conteos (numpy.ndarray): Cantidad de pares escritos en cada fila
+    """
+    for s in prange(salida.shape[0]):
+        inicio = inicio_lote + s * tam_segmento
+        conteos[s] = 0
+        if inicio < n_impares:
+            # Igual que en criba_gemelos, cada segmento incluye el primer
+            # impar del siguiente
+            fin = min(inicio + tam_segmento + 1, n_impares)
+            segmento = np.empty(fin - inicio, dtype=np.uint8)
+            _precribar(segmento, inicio, PRECRIBA_IMPARES)
+            if inicio < len(PRIMEROS_IMPARES):
+                cabeza = min(len(segmento), len(PRIMEROS_IMPARES) - inicio)
+                segmento[:cabeza] = PRIMEROS_IMPARES[inicio:inicio + cabeza]
+            conteos[s] = _gemelos_segmento_impares(segmento, inicio, primos_base, salida[s])
+
+def encontrar_primos_gemelos_paralelo(limite, tam_segmento=TAM_SEGMENTO):
+    """
+    Encuentra todos los pares de primos gemelos hasta un límite dado
+    cribando en paralelo, con numba.prange, lotes de segmentos
+    independientes entre sí.
+    
+    Sin numba los segmentos se criban uno tras otro.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        tam_segmento (int): Cantidad de impares por segmento
+        
+    Returns:
+        numpy.ndarray: Array de forma (N, 2) con un par de primos gemelos
+            por fila, int32 si limite < 2³¹ e int64 en otro caso
+    """
+    tipo = tipo_entero(limite)
+    
+    # El primer par gemelo es (3, 5)
+    if limite < 5:
+        return np.empty((0, 2), dtype=tipo)
+    
+    primeros = _leer_cache_gemelos(limite)
+    
+    if primeros is None:
+        # Con un byte por impar, cualquier segmento puede empezar con la precriba
+        primos_base = criba_eratostenes(isqrt(limite))[1:].astype(np.int64)
+        primos_base = primos_base[_primos_sin_precriba(primos_base, True):]
+        n_impares = (limite + 1) // 2
+        
+        # Un búfer de salida por segmento del lote
+        segmentos_por_lote = min(SEGMENTOS_POR_LOTE, -(-n_impares // tam_segmento))
+        salida = np.empty((segmentos_por_lote, tam_segmento // 3 + 2), dtype=tipo)
+        conteos = np.empty(segmentos_por_lote, dtype=np.int64)
+        primeros = []
+        
+        for inicio_lote in range(0, n_impares, segmentos_por_lote * tam_segmento):
+            _gemelos_lote_paralelo(inicio_lote, n_impares, tam_segmento,
+                                   primos_base, salida, conteos)
+            for s in range(segmentos_por_lote):
+                primeros.append(salida[s, :conteos[s]].copy())
+        
+        primeros = np.concatenate(primeros)
+        _guardar_cache_gemelos(limite, primeros)
+    
+    return np.column_stack((primeros, primeros + 2))
+
+if cuda is not None:
+    @cuda.jit
+    def _cribar_segmento_gpu(segmento, inicio, primos_base):
+        """
+        Tacha en la GPU los múltiplos de los primos base dentro de un
+        segmento de impares; cada hilo se encarga de un primo base.
+        
+        Args:
+            segmento (DeviceNDArray): La posición k representa a 2(inicio+k)+1
+            inicio (int): Posición del primer impar del segmento
+            primos_base (DeviceNDArray): Primos impares hasta la raíz del límite
+        """
+        i = cuda.grid(1)
+        if i < primos_base.size:
+            p = primos_base[i]
+            
+            # Primer múltiplo impar de p dentro del segmento, nunca menor que p²
+            primero = 2 * inicio + 1
+            multiplo = max(p * p, (primero + p - 1) // p * p)
+            if multiplo % 2 == 0:
+                multiplo += p
+            
+            for j in range((multiplo - 1) // 2 - inicio, segmento.size, p):
+                segmento[j] = 0
+    
+    @cuda.jit
+    def _iniciar_segmento_gpu(segmento, cuenta):
+        """
+        Marca en la GPU todos los impares del segmento como candidatos y
+        pone a cero la cuenta de pares, sin copiar nada desde la CPU.
+        
+        Args:
+            segmento (DeviceNDArray): Segmento de impares, un byte por impar
+            cuenta (DeviceNDArray): Array de un elemento con la cuenta de pares
+        """
+        k = cuda.grid(1)
+        if k < segmento.size:
+            segmento[k] = 1
+        if k == 0:
+            cuenta[0] = 0
+    
+    @cuda.jit
+    def _gemelos_segmento_gpu(segmento, inicio, salida, cuenta):
+        """
+        Escribe en la GPU el primer primo de cada par gemelo del segmento ya
+        cribado; cada hilo comprueba un impar y su siguiente, y reserva su
+        hueco en salida con una suma atómica, así que salen desordenados.
+        
+        Args:
+            segmento (DeviceNDArray): La posición k representa a 2(inicio+k)+1
+            inicio (int): Posición del primer impar del segmento
+            salida (DeviceNDArray): Array con sitio para todos los pares
+            cuenta (DeviceNDArray): Array de un elemento con la cuenta de pares
+        """
+        k = cuda.grid(1)
+        # El 1 (posición 0 del primer segmento) no es primo
+        if k < segmento.size - 1 and inicio + k > 0 and segmento[k] and segmento[k + 1]:
+            salida[cuda.atomic.add(cuenta, 0, 1)] = 2 * (inicio + k) + 1
+
+def encontrar_primos_gemelos_gpu(limite, umbral=UMBRAL_GPU, tam_segmento=TAM_SEGMENTO_GPU):
+    """
+    Encuentra todos los pares de primos gemelos hasta un límite dado
+    cribando los segmentos en la GPU con numba.cuda.
+    
+    Si no hay una GPU CUDA disponible o el límite no supera el umbral,
+    se usa criba_gemelos en la CPU.
+    
+    Args:
+        limite (int): Límite superior hasta donde buscar primos gemelos
+        umbral (int): Límite a partir del cual se usa la GPU
+        tam_segmento (int): Cantidad de impares por segmento
+        
+    Returns:
+        numpy.ndarray: Array de forma (N, 2) con un par de primos gemelos
+            por fila, int32 si limite < 2³¹ e int64 en otro caso
+    """
+    # El primer par gemelo es (3, 5)
+    if limite < 5 or cuda is None or limite <= umbral or not cuda.is_available():
+        return encontrar_primos_gemelos_optimizado(limite)
+    
+    primeros = _leer_cache_gemelos(limite)
+    
+    if primeros is None:
+        tipo = tipo_entero(limite)
+        primos_base = criba_eratostenes(isqrt(limite))[1:].astype(np.int64)
+        n_impares = (limite + 1) // 2
+        
+        # Los primos base, el segmento y los pares se quedan en la GPU: de
+        # cada segmento solo traemos la cuenta de pares y esos pares
+        primos_base_gpu = cuda.to_device(primos_base)
+        bloques = -(-len(primos_base) // HILOS_POR_BLOQUE)
+        bloques_segmento = -(-(tam_segmento + 1) // HILOS_POR_BLOQUE)
+        segmento_gpu = cuda.device_array(tam_segmento + 1, dtype=np.uint8)
+        # Salvo (3, 5), cada par es (6k-1, 6k+1): como mucho uno por cada tres impares
+        salida_gpu = cuda.device_array(tam_segmento // 3 + 2, dtype=tipo)
+        cuenta_gpu = cuda.device_array(1, dtype=np.int64)
+        primeros = []
+        
+        for inicio in range(0, n_impares, tam_segmento):
+            # Igual que en criba_gemelos, cada segmento incluye el primer
+            # impar del siguiente
+            longitud = min(tam_segmento + 1, n_impares - inicio)
+            segmento = segmento_gpu[:longitud]
+            _iniciar_segmento_gpu[bloques_segmento, HILOS_POR_BLOQUE](segmento, cuenta_gpu)
+            _cribar_segmento_gpu[bloques, HILOS_POR_BLOQUE](segmento, inicio, primos_base_gpu)
+            _gemelos_segmento_gpu[bloques_segmento, HILOS_POR_BLOQUE](
+                segmento, inicio, salida_gpu, cuenta_gpu)
+            
+            cuenta = int(cuenta_gpu.copy_to_host()[0])
+            if cuenta:
+                primeros.append(np.sort(salida_gpu[:cuenta].copy_to_host()))
+        
+        primeros = np.concatenate(primeros)
+        _guardar_cache_gemelos(limite, primeros)
+    
+    return np.column_stack((primeros, primeros + 2))
+
+def encontrar_primos_gemelos_optimizado(limite, solo_contar=False):
     """
     Encuentra todos los pares de primos gemelos hasta un límite dado
     utilizando la Criba de Eratóstenes.
     
     Args:
         limite (int): Límite superior hasta donde buscar primos gemelos
+        solo_contar (bool): Si solo se necesita cuántos pares hay, sin
+            construirlos
         
     Returns:
-        list: Lista de tuplas, cada una conteniendo un par de primos gemelos
+        numpy.ndarray: Array de forma (N, 2) con un par de primos gemelos
+            por fila, int32 si limite < 2³¹ e int64 en otro caso; si
+            solo_contar, la cantidad de pares como int
     """
-    # Obtenemos todos los primos hasta el límite
-    primos = criba_eratostenes(limite)
-    gemelos = []
+    if solo_contar:
+        return contar_gemelos(limite)
     
-    # Buscamos los pares con diferencia de 2
-    for i in range(len(primos) - 1):
-        if primos[i + 1] - primos[i] == 2:
-            gemelos.append((primos[i], primos[i + 1]))
+    primeros, segundos = criba_gemelos(limite)
     
-    return gemelos
+    return np.column_stack((primeros, segundos))
 
-def comparar_rendimiento(limite):
+def comparar_rendimiento(limite, marcas=None):
     """
     Compara el rendimiento entre el método básico y el optimizado
-    para encontrar primos gemelos.
+    para encontrar primos gemelos, y el del optimizado cuando solo
+    cuenta los pares.
     
     Args:
         limite (int): Límite superior hasta donde buscar primos gemelos
+        marcas (numpy.ndarray, opcional): Array booleano que el método
+            básico reutiliza para su criba en lugar de reservar uno nuevo
         
     Returns:
-        tuple: (tiempo_basico, tiempo_optimizado, cantidad_gemelos)
+        tuple: (tiempo_basico, tiempo_optimizado, tiempo_conteo, cantidad_gemelos)
     """
     # Importamos la función del método básico
     from gemelos import encontrar_primos_gemelos as metodo_basico
     
     # Medimos el tiempo del método básico
-    inicio = time()
-    gemelos_basico = metodo_basico(limite)
-    tiempo_basico = time() - inicio
+    inicio = perf_counter()
+    gemelos_basico = metodo_basico(limite, marcas)
+    tiempo_basico = perf_counter() - inicio
+    
+    # Calentamos el método optimizado con un límite pequeño, suficiente para
+    # pasar por la criba con rueda, de modo que el tiempo medido no incluya
+    # la compilación de los núcleos de numba
+    if NUMBA_DISPONIBLE:
+        calentamiento = min(limite, UMBRAL_BYTEARRAY ** 2)
+        encontrar_primos_gemelos_optimizado(calentamiento)
+        limpiar_cache_gemelos()
+        encontrar_primos_gemelos_optimizado(calentamiento, solo_contar=True)
     
-    # Medimos el tiempo del método optimizado
-    inicio = time()
+    # Medimos el tiempo del método optimizado, sin reutilizar cribas previas
+    limpiar_cache_gemelos()
+    inicio = perf_counter()
     gemelos_optimizado = encontrar_primos_gemelos_optimizado(limite)
-    tiempo_optimizado = time() - inicio
+    tiempo_optimizado = perf_counter() - inicio
     
-    # Verificamos que ambos métodos den los mismos resultados
-    assert len(gemelos_basico) == len(gemelos_optimizado), "Los métodos dieron resultados diferentes"
+    # Y el de contar los pares sin construirlos, también desde cero
+    limpiar_cache_gemelos()
+    inicio = perf_counter()
+    cantidad = encontrar_primos_gemelos_optimizado(limite, solo_contar=True)
+    tiempo_conteo = perf_counter() - inicio
     
-    return tiempo_basico, tiempo_optimizado, len(gemelos_optimizado)
+    # Verificamos que ambos métodos den exactamente los mismos pares
+    assert np.array_equal(gemelos_basico, gemelos_optimizado), "Los métodos dieron resultados diferentes"
+    assert cantidad == gemelos_optimizado.shape[0], "El conteo no coincide con los pares encontrados"
+    
+    return tiempo_basico, tiempo_optimizado, tiempo_conteo, cantidad
 
 def graficar_comparacion(limites):
     """
@@ -96,30 +1218,46 @@ def graficar_comparacion(limites):
     Args:
         limites (list): Lista de límites a comparar
     """
+    # Matplotlib solo se carga cuando realmente hay que graficar
+    import matplotlib.pyplot as plt
+    from gemelos import tam_marcas
+    
     tiempos_basico = []
     tiempos_optimizado = []
+    tiempos_conteo = []
     cantidades = []
     
+    # Una sola criba del método básico, del tamaño del mayor límite, sirve
+    # para todas las comparaciones
+    marcas = np.empty(tam_marcas(max(limites, default=1)), dtype=bool)
+    
     for limite in limites:
         print(f"Comparando rendimiento para límite {limite}...")
-        tiempo_basico, tiempo_optimizado, cantidad = comparar_rendimiento(limite)
+        tiempo_basico, tiempo_optimizado, tiempo_conteo, cantidad = comparar_rendimiento(limite, marcas)
         
         tiempos_basico.append(tiempo_basico)
         tiempos_optimizado.append(tiempo_optimizado)
+        tiempos_conteo.append(tiempo_conteo)
         cantidades.append(cantidad)
         
         print(f"  Método básico: {tiempo_basico:.4f} segundos")
         print(f"  Método optimizado: {tiempo_optimizado:.4f} segundos")
-        print(f"  Mejora: {tiempo_basico/tiempo_optimizado:.2f}x más rápido")
+        # Un tiempo por debajo de la resolución del reloj puede medirse como 0
+        if tiempo_optimizado > 0:
+            print(f"  Mejora: {tiempo_basico/tiempo_optimizado:.2f}x más rápido")
+        else:
+            print("  Mejora: no medible (el método optimizado tardó menos que la resolución del reloj)")
+        print(f"  Solo contar (optimizado): {tiempo_conteo:.4f} segundos")
         print(f"  Cantidad de pares gemelos: {cantidad}")
     
     # Crear el gráfico de barras comparativo
     plt.figure(figsize=(12, 6))
     indices = np.arange(len(limites))
-    width = 0.35
+    width = 0.25
     
-    plt.bar(indices - width/2, tiempos_basico, width, label='Método Básico')
-    plt.bar(indices + width/2, tiempos_optimizado, width, label='Método Optimizado (Criba)')
+    plt.bar(indices - width, tiempos_basico, width, label='Método Básico')
+    plt.bar(indices, tiempos_optimizado, width, label='Método Optimizado (Criba)')
+    plt.bar(indices + width, tiempos_conteo, width, label='Optimizado, solo conteo')
     
     plt.title('Comparación de Rendimiento: Búsqueda de Primos Gemelos')
     plt.xlabel('Límite')
@@ -130,7 +1268,7 @@ def graficar_comparacion(limites):
     
     # Agregar etiquetas con la cantidad de pares encontrados
     for i, cantidad in enumerate(cantidades):
-        plt.text(i, max(tiempos_basico[i], tiempos_optimizado[i]) + 0.05, 
+        plt.text(i, max(tiempos_basico[i], tiempos_optimizado[i], tiempos_conteo[i]) + 0.05, 
                  f"{cantidad} pares", ha='center')
     
     plt.tight_layout()